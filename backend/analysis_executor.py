@@ -0,0 +1,98 @@
+"""
+Copyright (c) 2024 FootprintScan. All Rights Reserved.
+
+This software and associated documentation files (the "Software") are proprietary
+and confidential. Unauthorized copying, modification, distribution, or use of
+this Software, via any medium, is strictly prohibited without express written
+permission from the copyright holder.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+import numpy as np
+
+
+class AnalysisExecutor:
+    """Runs blocking analysis jobs off the event loop, a bounded number at a time.
+
+    Large jobs share max_concurrent threads and queue for them in order.
+    Jobs of at most small_job_size items run on a separate set of threads,
+    so small scans are not stuck behind large ones. Time spent queued and
+    running is kept for the /stats endpoint.
+    """
+
+    def __init__(self, max_concurrent: int = 2, small_job_size: int = 200, small_workers: int = 2):
+        self.max_concurrent = max_concurrent
+        self.small_job_size = small_job_size
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix='analysis')
+        self._small_pool = ThreadPoolExecutor(max_workers=small_workers, thread_name_prefix='analysis-small')
+
+        self._lock = threading.Lock()
+        self._wait_times: deque = deque(maxlen=1000)
+        self._run_times: deque = deque(maxlen=1000)
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+
+    async def run(self, fn: Callable[..., Any], *args, size: int = 0) -> Any:
+        """Run fn(*args) in the pool for a job of the given size and return its result"""
+        pool = self._small_pool if size <= self.small_job_size else self._pool
+        submitted = time.perf_counter()
+        started = abandoned = False
+
+        def job():
+            nonlocal started
+            with self._lock:
+                if abandoned:
+                    return None
+                started = True
+                self.queued -= 1
+                self.running += 1
+                self._wait_times.append(time.perf_counter() - submitted)
+            job_started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+                    self._run_times.append(time.perf_counter() - job_started)
+
+        with self._lock:
+            self.queued += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, job)
+        finally:
+            # A request cancelled before a thread picked up its job leaves
+            # the queue here, and the job is skipped if a thread reaches it
+            with self._lock:
+                if not started:
+                    abandoned = True
+                    self.queued -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            wait_times = np.array(self._wait_times) * 1000 if self._wait_times else np.zeros(1)
+            run_times = np.array(self._run_times) * 1000 if self._run_times else np.zeros(1)
+            return {
+                'max_concurrent': self.max_concurrent,
+                'queued': self.queued,
+                'running': self.running,
+                'completed': self.completed,
+                'queue_ms_p50': float(np.percentile(wait_times, 50)),
+                'queue_ms_p95': float(np.percentile(wait_times, 95)),
+                'run_ms_p50': float(np.percentile(run_times, 50)),
+                'run_ms_p95': float(np.percentile(run_times, 95))
+            }
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._small_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,126 @@
+"""
+Copyright (c) 2024 FootprintScan. All Rights Reserved.
+
+This software and associated documentation files (the "Software") are proprietary
+and confidential. Unauthorized copying, modification, distribution, or use of
+this Software, via any medium, is strictly prohibited without express written
+permission from the copyright holder.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class AvatarIndex:
+    """BK-tree over 64-bit perceptual hashes for Hamming-distance neighbour queries.
+
+    Identical hashes share one tree node; the accounts using that hash are kept
+    in a side table. When a path is given, every new (hash, ref) pair is appended
+    to it and the tree is rebuilt from it on startup.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        # Each node is [hash, {distance: child_node}]
+        self._root: Optional[list] = None
+        self._refs: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._log = None
+
+        if self.path:
+            self._load()
+            self._log = open(self.path, 'a', encoding='utf-8')
+
+    def _load(self):
+        """Replay the append-only index file"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                phash, _, ref = line.rstrip('\n').partition('\t')
+                try:
+                    self._insert(int(phash, 16), ref)
+                except ValueError:
+                    continue
+
+    def _insert(self, value: int, ref: str) -> bool:
+        """Insert into the tree; returns False if the pair was already present"""
+        refs = self._refs.get(value)
+        if refs is not None:
+            if ref in refs:
+                return False
+            refs.add(ref)
+            return True
+
+        self._refs[value] = {ref}
+        if self._root is None:
+            self._root = [value, {}]
+            return True
+
+        node = self._root
+        while True:
+            distance = (node[0] ^ value).bit_count()
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = [value, {}]
+                return True
+            node = child
+
+    def add(self, phash: str, ref: str):
+        """Record that the account identified by ref uses the avatar with this hash"""
+        try:
+            value = int(phash, 16)
+        except (TypeError, ValueError):
+            return
+
+        with self._lock:
+            if self._insert(value, ref) and self._log is not None:
+                self._log.write(f"{phash}\t{ref}\n")
+                self._log.flush()
+
+    def query(self, phash: str, max_distance: int, refs: Optional[Set[str]] = None) -> List[Tuple[str, int]]:
+        """Return (ref, distance) for every indexed avatar within max_distance.
+
+        With refs, only those accounts are returned, so a popular default
+        avatar costs no more than the refs asked about.
+        """
+        try:
+            value = int(phash, 16)
+        except (TypeError, ValueError):
+            return []
+
+        matches = []
+        with self._lock:
+            if self._root is None:
+                return matches
+
+            stack = [self._root]
+            while stack:
+                node_value, children = stack.pop()
+                distance = (node_value ^ value).bit_count()
+                if distance <= max_distance:
+                    node_refs = self._refs[node_value] if refs is None else self._refs[node_value].intersection(refs)
+                    matches.extend((ref, distance) for ref in node_refs)
+
+                # Triangle inequality: only children in [d - k, d + k] can match
+                low = distance - max_distance
+                high = distance + max_distance
+                for child_distance, child in children.items():
+                    if low <= child_distance <= high:
+                        stack.append(child)
+
+        matches.sort(key=lambda match: match[1])
+        return matches
+
+    def __len__(self) -> int:
+        return len(self._refs)
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
@@ -0,0 +1,140 @@
+"""
+Copyright (c) 2024 FootprintScan. All Rights Reserved.
+
+This software and associated documentation files (the "Software") are proprietary
+and confidential. Unauthorized copying, modification, distribution, or use of
+this Software, via any medium, is strictly prohibited without express written
+permission from the copyright holder.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+"""
+
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+from PIL import Image
+import imagehash
+import httpx
+from cache import LRUCache
+
+_MISSING = object()
+
+
+class AvatarHasher:
+    """Fetches avatars and computes perceptual hashes without blocking the event loop"""
+
+    def __init__(self):
+        self.max_bytes = int(os.getenv('AVATAR_MAX_BYTES', str(2 * 1024 * 1024)))
+        self.max_pixels = int(os.getenv('AVATAR_MAX_PIXELS', str(4096 * 4096)))
+        self.timeout = float(os.getenv('AVATAR_FETCH_TIMEOUT', '10.0'))
+        self.cache = LRUCache(
+            maxsize=int(os.getenv('AVATAR_CACHE_SIZE', '4096')),
+            ttl=float(os.getenv('AVATAR_CACHE_TTL', '86400'))
+        )
+        # Avatars that could not be hashed are retried after this many seconds (0: every time)
+        self.negative_ttl = float(os.getenv('AVATAR_NEGATIVE_CACHE_TTL', '300'))
+        self._semaphore = asyncio.Semaphore(int(os.getenv('AVATAR_FETCH_CONCURRENCY', '8')))
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv('AVATAR_HASH_WORKERS', '4')),
+            thread_name_prefix='avatar-hash'
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Return the shared HTTP client, creating it on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+            )
+        return self._client
+
+    async def _download(self, avatar_url: str) -> Optional[bytes]:
+        """Stream the avatar body, giving up once it exceeds max_bytes"""
+        async with self._semaphore:
+            async with self._get_client().stream('GET', avatar_url) as response:
+                if response.status_code != 200:
+                    return None
+
+                content_length = response.headers.get('content-length')
+                if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+                    return None
+
+                buffer = bytearray()
+                async for chunk in response.aiter_bytes():
+                    buffer.extend(chunk)
+                    if len(buffer) > self.max_bytes:
+                        return None
+                return bytes(buffer)
+
+    def _compute_phash(self, data: bytes) -> Optional[str]:
+        """Decode image bytes and compute the perceptual hash (runs in a worker thread)"""
+        img = Image.open(BytesIO(data))
+        width, height = img.size
+        if width * height > self.max_pixels:
+            return None
+        # Let the JPEG decoder downscale while decoding instead of after
+        img.draft('L', (256, 256))
+        img = img.convert('L').resize((256, 256))
+        return str(imagehash.phash(img))
+
+    async def _fetch_and_hash(self, avatar_url: str) -> Tuple[Optional[str], bool]:
+        """Return the hash, or None, and whether the outcome may be cached"""
+        try:
+            data = await self._download(avatar_url)
+        except httpx.HTTPError:
+            # Timeouts and connection errors are transient; try again next time
+            return None, False
+        except Exception:
+            return None, True
+        if not data:
+            return None, True
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._compute_phash, data), True
+        except Exception:
+            return None, True
+
+    async def hash(self, avatar_url: Optional[str]) -> Optional[str]:
+        """Return the perceptual hash for an avatar URL, using the cache when possible"""
+        if not avatar_url:
+            return None
+
+        cached = self.cache.get(avatar_url, _MISSING)
+        if cached is not _MISSING:
+            return cached
+
+        # Share a single download between concurrent callers for the same URL
+        pending = self._inflight.get(avatar_url)
+        if pending is not None:
+            return (await asyncio.shield(pending))[0]
+
+        future = asyncio.ensure_future(self._fetch_and_hash(avatar_url))
+        self._inflight[avatar_url] = future
+        try:
+            phash, cacheable = await asyncio.shield(future)
+        finally:
+            self._inflight.pop(avatar_url, None)
+
+        # Broken avatars are cached briefly so they are not refetched by every scan
+        if cacheable and (phash or self.negative_ttl > 0):
+            self.cache.set(avatar_url, phash, ttl=None if phash else self.negative_ttl)
+        return phash
+
+    async def hash_many(self, avatar_urls: List[Optional[str]]) -> List[Optional[str]]:
+        """Hash several avatars concurrently, preserving input order"""
+        return list(await asyncio.gather(*(self.hash(url) for url in avatar_urls)))
+
+    async def aclose(self):
+        """Close the shared HTTP client and worker threads"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._executor.shutdown(wait=False)
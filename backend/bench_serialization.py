@@ -0,0 +1,143 @@
+"""
+Copyright (c) 2024 FootprintScan. All Rights Reserved.
+
+This software and associated documentation files (the "Software") are proprietary
+and confidential. Unauthorized copying, modification, distribution, or use of
+this Software, via any medium, is strictly prohibited without express written
+permission from the copyright holder.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+"""
+
+# Compares the default FastAPI response path with the orjson / model_construct
+# path for a synthetic scan response.
+#
+# Usage:
+#     python bench_serialization.py [--items 5000] [--repeat 5]
+
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+from models import (
+    ScanResponse, FootprintResult, Platform, RiskAnalysis, RiskMetrics,
+    ConfidenceScore, TimelineEntry
+)
+from serialization import dumps
+
+
+def make_inputs(items: int) -> Dict[str, list]:
+    """Plain data shaped like the output of the analysis stage"""
+    platforms = [Platform.REDDIT, Platform.TWITTER, Platform.YOUTUBE, Platform.MEDIUM]
+    accounts = [
+        FootprintResult(
+            platform=platform,
+            username=f"user{i}",
+            profile_url=f"https://example.com/{platform.value}/user{i}",
+            confidence_score=0.8,
+            posts=[
+                {'content': f"post {j} " * 20, 'url': f"https://example.com/{platform.value}/{i}/{j}", 'timestamp': 1600000000.0 + j}
+                for j in range(items // len(platforms))
+            ]
+        )
+        for i, platform in enumerate(platforms)
+    ]
+    risk_rows = []
+    timeline_rows = []
+    for account in accounts:
+        for post in account.posts:
+            metrics = {
+                'toxicity': 0.1, 'hate_speech': 0.0, 'nsfw': 0.0, 'political_intensity': 0.2,
+                'sentiment': 0.3, 'volatility': 0.4, 'overall_risk': 12.5
+            }
+            timestamp = datetime.fromtimestamp(post['timestamp'], tz=timezone.utc)
+            risk_rows.append({
+                'post_id': post['url'], 'platform': account.platform, 'content': post['content'],
+                'timestamp': timestamp, 'url': post['url'], 'metrics': metrics,
+                'flagged': False, 'flags': [], 'duplicates': []
+            })
+            timeline_rows.append({
+                'timestamp': timestamp, 'platform': account.platform, 'type': 'post',
+                'content': post['content'][:200], 'url': post['url'], 'risk_score': 12.5
+            })
+    return {'accounts': accounts, 'risk_rows': risk_rows, 'timeline_rows': timeline_rows}
+
+
+def build_response(inputs: Dict[str, list], construct: bool) -> ScanResponse:
+    accounts: List[FootprintResult] = inputs['accounts']
+    if construct:
+        risk_analysis = [
+            RiskAnalysis.model_construct(**{**row, 'metrics': RiskMetrics.model_construct(**row['metrics'])})
+            for row in inputs['risk_rows']
+        ]
+        timeline = [TimelineEntry.model_construct(**row) for row in inputs['timeline_rows']]
+        confidence_scores = [
+            ConfidenceScore.model_construct(platform=a.platform, username=a.username, score=a.confidence_score, factors={})
+            for a in accounts
+        ]
+        model = ScanResponse.model_construct
+    else:
+        risk_analysis = [RiskAnalysis(**{**row, 'metrics': RiskMetrics(**row['metrics'])}) for row in inputs['risk_rows']]
+        timeline = [TimelineEntry(**row) for row in inputs['timeline_rows']]
+        confidence_scores = [
+            ConfidenceScore(platform=a.platform, username=a.username, score=a.confidence_score, factors={})
+            for a in accounts
+        ]
+        model = ScanResponse
+
+    footprints: Dict[str, List[FootprintResult]] = {}
+    for account in accounts:
+        footprints.setdefault(account.platform.value, []).append(account)
+    return model(
+        accounts_found=len(accounts),
+        footprints=footprints,
+        confidence_scores=confidence_scores,
+        risk_analysis=risk_analysis,
+        timeline=timeline,
+        scan_id=str(uuid.uuid4()),
+        scan_timestamp=datetime.now()
+    )
+
+
+def default_path(inputs: Dict[str, list]) -> bytes:
+    """What FastAPI does for a returned model with response_model set"""
+    response = build_response(inputs, construct=False)
+    content = response.model_dump(by_alias=True)
+    validated = ScanResponse.model_validate(content)
+    encoded = validated.model_dump(mode='json', by_alias=True)
+    return json.dumps(encoded, ensure_ascii=False, allow_nan=False, indent=None, separators=(',', ':')).encode('utf-8')
+
+
+def fast_path(inputs: Dict[str, list]) -> bytes:
+    return dumps(build_response(inputs, construct=True))
+
+
+def bench(name: str, fn: Callable[[Dict[str, list]], bytes], inputs: Dict[str, list], repeat: int):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn(inputs)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(f"{name:<10} best {timings[0] * 1000:8.1f} ms   median {timings[len(timings) // 2] * 1000:8.1f} ms   {len(body) / 1024:8.0f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark scan response serialization')
+    parser.add_argument('--items', type=int, default=5000, help='posts in the synthetic scan')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    inputs = make_inputs(args.items)
+    assert json.loads(default_path(inputs)).keys() == json.loads(fast_path(inputs)).keys()
+    print(f"{args.items} risk items and timeline entries, {args.repeat} runs")
+    bench('default', default_path, inputs, args.repeat)
+    bench('orjson', fast_path, inputs, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+Copyright (c) 2024 FootprintScan. All Rights Reserved.
+
+This software and associated documentation files (the "Software") are proprietary
+and confidential. Unauthorized copying, modification, distribution, or use of
+this Software, via any medium, is strictly prohibited without express written
+permission from the copyright holder.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+"""
+
+import zlib
+from typing import Dict, Optional, Sequence, Tuple
+import brotli
+import zstandard
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Content codings offered, most preferred first
+ENCODINGS = ('zstd', 'br', 'gzip')
+
+# Formats that are compressed already
+INCOMPRESSIBLE_MEDIA_TYPES = ('application/vnd.apache.parquet', 'application/zip', 'application/gzip', 'image/')
+
+
+class _Compressor:
+    """Incremental compressor for one content coding"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == 'zstd':
+            self._zstd = zstandard.ZstdCompressor(level=3).compressobj()
+        elif encoding == 'br':
+            self._br = brotli.Compressor(quality=4)
+        else:
+            self._gzip = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes, flush: bool = True) -> bytes:
+        """Compress a chunk; flushing lets streamed chunks reach the client as they come"""
+        if self.encoding == 'zstd':
+            data = self._zstd.compress(data)
+            return data + self._zstd.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK) if flush else data
+        if self.encoding == 'br':
+            data = self._br.process(data)
+            return data + self._br.flush() if flush else data
+        data = self._gzip.compress(data)
+        return data + self._gzip.flush(zlib.Z_SYNC_FLUSH) if flush else data
+
+    def finish(self) -> bytes:
+        if self.encoding == 'zstd':
+            return self._zstd.flush()
+        if self.encoding == 'br':
+            return self._br.finish()
+        return self._gzip.flush()
+
+
+def negotiate_encoding(accept_encoding: str, encodings: Sequence[str] = ENCODINGS) -> Optional[str]:
+    """
+    Pick a content coding from an Accept-Encoding header.
+    
+    The highest q-value wins; ties go to the earlier entry in encodings.
+    Returns None when the client accepts none of them.
+    """
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        qualities[coding] = q
+    
+    best: Tuple[float, Optional[str]] = (0.0, None)
+    for encoding in encodings:
+        q = qualities.get(encoding, qualities.get('*', 0.0))
+        if q > best[0]:
+            best = (q, encoding)
+    return best[1]
+
+
+class CompressionMiddleware:
+    """
+    Compresses HTTP responses with zstd, brotli or gzip, as the client accepts.
+    
+    Bodies sent in one piece are left alone below minimum_size bytes.
+    Streamed bodies are compressed chunk by chunk. Responses that already
+    have a Content-Encoding, or whose media type is compressed already,
+    pass through untouched.
+    """
+    
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        
+        encoding = negotiate_encoding(Headers(scope=scope).get('accept-encoding', ''))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        await _CompressionResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+
+class _CompressionResponder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send: Send = None
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+    
+    async def send_compressed(self, message: Message):
+        if message['type'] == 'http.response.start':
+            # Held back until the first body chunk shows whether to compress
+            self.start_message = message
+            headers = Headers(raw=message['headers'])
+            self.passthrough = (
+                'content-encoding' in headers
+                or headers.get('content-type', '').startswith(INCOMPRESSIBLE_MEDIA_TYPES)
+            )
+            return
+        if message['type'] != 'http.response.body' or self.passthrough:
+            await self._flush_start()
+            await self.send(message)
+            return
+        
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+        
+        if self.compressor is None:
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self._flush_start()
+                await self.send(message)
+                return
+            
+            self.compressor = _Compressor(self.encoding)
+            headers = MutableHeaders(raw=self.start_message['headers'])
+            headers['Content-Encoding'] = self.encoding
+            headers.add_vary_header('Accept-Encoding')
+            
+            if not more_body:
+                body = self.compressor.compress(body, flush=False) + self.compressor.finish()
+                headers['Content-Length'] = str(len(body))
+                await self._flush_start()
+                await self.send({'type': 'http.response.body', 'body': body})
+                return
+            
+            # Streamed: the final length is unknown
+            del headers['Content-Length']
+            await self._flush_start()
+        
+        if more_body:
+            body = self.compressor.compress(body)
+        else:
+            body = self.compressor.compress(body, flush=False) + self.compressor.finish()
+        await self.send({'type': 'http.response.body', 'body': body, 'more_body': more_body})
+    
+    async def _flush_start(self):
+        if self.start_message is not None:
+            await self.send(self.start_message)
+            self.start_message = None
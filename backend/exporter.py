@@ -0,0 +1,232 @@
+"""
+Copyright (c) 2024 FootprintScan. All Rights Reserved.
+
+This software and associated documentation files (the "Software") are proprietary
+and confidential. Unauthorized copying, modification, distribution, or use of
+this Software, via any medium, is strictly prohibited without express written
+permission from the copyright holder.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+"""
+
+import io
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+from scan_store import REPORT_HEADER_SECTIONS, REPORT_LIST_SECTIONS, StoredScan
+from serialization import ORJSON_OPTIONS
+
+EXPORT_FORMATS = ('json', 'ndjson', 'arrow', 'parquet')
+EXPORT_TABLES = ('footprints', 'risk_analysis', 'timeline')
+EXPORT_MEDIA_TYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
+_METRICS = ('toxicity', 'hate_speech', 'nsfw', 'political_intensity', 'sentiment', 'volatility', 'overall_risk')
+
+
+def iter_ndjson(stored: StoredScan, include: Optional[Dict[str, Any]] = None, batch_rows: int = 1000) -> Iterator[bytes]:
+    """
+    Stream a stored scan as newline-delimited JSON.
+    
+    The first line holds the single-valued report sections, tagged
+    "record": "scan". Every footprint, confidence score, risk analysis,
+    timeline entry and identity cluster then follows on its own line,
+    tagged with its section name. include is a projection as for the JSON
+    report. Lines are sent batch_rows at a time, so only one batch is held
+    in memory.
+    """
+    include = include or dict.fromkeys(REPORT_HEADER_SECTIONS + REPORT_LIST_SECTIONS, True)
+    option = ORJSON_OPTIONS | orjson.OPT_APPEND_NEWLINE
+    
+    header = {'record': 'scan'}
+    header.update((name, stored.header_value(name)) for name in REPORT_HEADER_SECTIONS if name in include)
+    lines = [orjson.dumps(header, option=option)]
+    
+    for name in REPORT_LIST_SECTIONS:
+        if name not in include:
+            continue
+        item_include = None if include[name] is True else include[name]['__all__']
+        if name == 'footprints' and item_include is not None:
+            item_include = item_include['__all__']
+        
+        for item in stored.iter_section(name):
+            record = {'record': name}
+            record.update(item.model_dump(include=item_include))
+            lines.append(orjson.dumps(record, option=option))
+            if len(lines) >= batch_rows:
+                yield b''.join(lines)
+                lines = []
+    
+    if lines:
+        yield b''.join(lines)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain"""
+    
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _footprint_rows(stored: StoredScan) -> Iterator[Dict[str, Any]]:
+    for result in stored.iter_section('footprints'):
+        yield {
+            'platform': result.platform.value,
+            'username': result.username,
+            'profile_name': result.profile_name,
+            'profile_url': result.profile_url,
+            'avatar_url': result.avatar_url,
+            'bio': result.bio,
+            'confidence_score': result.confidence_score,
+            'post_count': len(result.posts),
+            'comment_count': len(result.comments),
+            'links': result.links
+        }
+
+
+def _risk_analysis_rows(stored: StoredScan) -> Iterator[Dict[str, Any]]:
+    for analysis in stored.iter_section('risk_analysis'):
+        row = {
+            'post_id': analysis.post_id,
+            'platform': analysis.platform.value,
+            'url': analysis.url,
+            'timestamp': _utc(analysis.timestamp),
+            'content': analysis.content
+        }
+        for metric in _METRICS:
+            row[metric] = getattr(analysis.metrics, metric)
+        row['flagged'] = analysis.flagged
+        row['flags'] = analysis.flags
+        row['duplicates'] = analysis.duplicates
+        yield row
+
+
+def _timeline_rows(stored: StoredScan) -> Iterator[Dict[str, Any]]:
+    for entry in stored.iter_section('timeline'):
+        yield {
+            'timestamp': entry.timestamp,
+            'platform': entry.platform.value,
+            'type': entry.type,
+            'content': entry.content,
+            'url': entry.url,
+            'risk_score': entry.risk_score,
+            'duplicate_of': entry.duplicate_of
+        }
+
+
+_TABLE_ROWS: Dict[str, Callable[[StoredScan], Iterator[Dict[str, Any]]]] = {
+    'footprints': _footprint_rows,
+    'risk_analysis': _risk_analysis_rows,
+    'timeline': _timeline_rows
+}
+
+
+def table_schema(table: str) -> 'pa.Schema':
+    """Arrow schema of an export table; every table starts with scan_id so files can be concatenated"""
+    timestamp = pa.timestamp('s', tz='UTC')
+    if table == 'footprints':
+        fields = [
+            ('platform', pa.string()),
+            ('username', pa.string()),
+            ('profile_name', pa.string()),
+            ('profile_url', pa.string()),
+            ('avatar_url', pa.string()),
+            ('bio', pa.string()),
+            ('confidence_score', pa.float64()),
+            ('post_count', pa.int32()),
+            ('comment_count', pa.int32()),
+            ('links', pa.list_(pa.string()))
+        ]
+    elif table == 'risk_analysis':
+        fields = [
+            ('post_id', pa.string()),
+            ('platform', pa.string()),
+            ('url', pa.string()),
+            ('timestamp', timestamp),
+            ('content', pa.string())
+        ]
+        fields += [(metric, pa.float64()) for metric in _METRICS]
+        fields += [
+            ('flagged', pa.bool_()),
+            ('flags', pa.list_(pa.string())),
+            ('duplicates', pa.list_(pa.string()))
+        ]
+    else:
+        fields = [
+            ('timestamp', timestamp),
+            ('platform', pa.string()),
+            ('type', pa.string()),
+            ('content', pa.string()),
+            ('url', pa.string()),
+            ('risk_score', pa.float64()),
+            ('duplicate_of', pa.string())
+        ]
+    return pa.schema([('scan_id', pa.string())] + fields)
+
+
+def iter_table(stored: StoredScan, table: str, fmt: str, batch_rows: int = 1000) -> Iterator[bytes]:
+    """
+    Stream one table of a stored scan as an Arrow IPC stream or a Parquet file.
+    
+    Rows are converted to a record batch batch_rows at a time; each batch
+    becomes an IPC message or a Parquet row group and is sent before the
+    next one is built.
+    """
+    schema = table_schema(table)
+    sink = _ChunkSink()
+    if fmt == 'parquet':
+        writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    
+    def write(rows: List[Dict[str, Any]]) -> bytes:
+        for row in rows:
+            row['scan_id'] = stored.scan_id
+        writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=schema))
+        return sink.drain()
+    
+    try:
+        rows: List[Dict[str, Any]] = []
+        for row in _TABLE_ROWS[table](stored):
+            rows.append(row)
+            if len(rows) >= batch_rows:
+                yield write(rows)
+                rows = []
+        if rows:
+            yield write(rows)
+    finally:
+        writer.close()
+    # Parquet footer or IPC end-of-stream marker
+    yield sink.drain()
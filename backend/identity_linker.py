@@ -0,0 +1,209 @@
+"""
+Copyright (c) 2024 FootprintScan. All Rights Reserved.
+
+This software and associated documentation files (the "Software") are proprietary
+and confidential. Unauthorized copying, modification, distribution, or use of
+this Software, via any medium, is strictly prohibited without express written
+permission from the copyright holder.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+"""
+
+import os
+from collections import defaultdict
+from itertools import combinations
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+from models import QueryInputs, IdentityCluster, IdentityClusterMember
+from records import AccountRecord
+from identity_matcher import IdentityMatcher
+from link_index import LinkIndex
+
+
+class _DisjointSet:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int):
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i != root_j:
+            self.parent[root_j] = root_i
+
+
+class IdentityLinker:
+    """Clusters accounts into identities, scoring only pairs that share a blocking key"""
+
+    def __init__(self, matcher: IdentityMatcher):
+        self.matcher = matcher
+        self.threshold = float(os.getenv('IDENTITY_LINK_THRESHOLD', '0.5'))
+        self.prefix_length = int(os.getenv('IDENTITY_USERNAME_PREFIX', '4'))
+        # Blocks larger than this are too generic to be useful and would reintroduce all-pairs cost
+        self.max_block_size = int(os.getenv('IDENTITY_MAX_BLOCK_SIZE', '50'))
+        self.minhasher = matcher.minhasher
+
+    def candidate_pairs(
+        self,
+        results: List[AccountRecord],
+        avatar_hashes: List[Optional[str]],
+        link_index: LinkIndex,
+        signatures: List[np.ndarray]
+    ) -> Set[Tuple[int, int]]:
+        """
+        Generate candidate account pairs from cheap blocking keys.
+
+        Avatar candidates come from the matcher's avatar index, which
+        index_avatars has already filled with these accounts' hashes: each
+        account is blocked with the accounts of this scan whose avatars are
+        within the matcher's avatar_match_distance.
+        """
+        blocks: Dict[tuple, List[int]] = defaultdict(list)
+        positions: Dict[str, List[int]] = defaultdict(list)
+        for i, result in enumerate(results):
+            positions[result.profile_url].append(i)
+        # Index lookups are limited to this scan's accounts, however often an avatar was seen before
+        scan_refs = set(positions)
+
+        for i, result in enumerate(results):
+            username = self.matcher.normalize_username(result.username or '')
+            if len(username) >= 3:
+                blocks[('username', username[:self.prefix_length])].append(i)
+
+            if avatar_hashes[i]:
+                members = {i}
+                for ref, _ in self.matcher.find_similar_avatars(avatar_hashes[i], refs=scan_refs):
+                    members.update(positions.get(ref, ()))
+                if len(members) > 1:
+                    blocks[('avatar', i)] = sorted(members)
+
+            for band_key in self.minhasher.band_keys(signatures[i]):
+                blocks[('minhash',) + band_key].append(i)
+
+        # Every postings list of the link index is a block of its own
+        block_members = list(blocks.values()) + [sorted(accounts) for accounts in link_index.shared_postings()]
+
+        pairs: Set[Tuple[int, int]] = set()
+        for members in block_members:
+            if 1 < len(members) <= self.max_block_size:
+                pairs.update(combinations(members, 2))
+        return pairs
+
+    def _bio_embeddings(self, results: List[AccountRecord]) -> Dict[int, np.ndarray]:
+        """Encode every bio once, normalized so cosine similarity is a dot product"""
+        indexed = [(i, result.bio) for i, result in enumerate(results) if result.bio]
+        if not indexed:
+            return {}
+        try:
+            embeddings = self.matcher.embedding_model.encode([bio for _, bio in indexed])
+        except Exception:
+            return {}
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings = embeddings / np.where(norms == 0, 1, norms)
+        return {i: embeddings[row] for row, (i, _) in enumerate(indexed)}
+
+    def _stylometry_scores(self, signatures: List[np.ndarray], pairs: List[Tuple[int, int]]) -> np.ndarray:
+        """Compare the signatures of every candidate pair in one vectorized pass"""
+        if not pairs:
+            return np.zeros(0)
+        matrix = np.stack(signatures)
+        empty = np.array([self.minhasher.is_empty(sig) for sig in signatures])
+        left = np.fromiter((i for i, _ in pairs), dtype=np.intp, count=len(pairs))
+        right = np.fromiter((j for _, j in pairs), dtype=np.intp, count=len(pairs))
+        scores = (matrix[left] == matrix[right]).mean(axis=1)
+        scores[empty[left] | empty[right]] = 0.0
+        return scores
+
+    async def link(self, results: List[AccountRecord], query_inputs: QueryInputs) -> List[IdentityCluster]:
+        """Score candidate pairs and return clusters of accounts that belong to one identity"""
+        if len(results) < 2:
+            return []
+        avatar_hashes = await self.matcher.index_avatars(results)
+        return self.cluster(results, avatar_hashes, query_inputs)
+
+    def cluster(
+        self,
+        results: List[AccountRecord],
+        avatar_hashes: List[Optional[str]],
+        query_inputs: QueryInputs
+    ) -> List[IdentityCluster]:
+        """Cluster accounts whose avatars are already hashed; blocking, so run it off the event loop"""
+        if len(results) < 2:
+            return []
+
+        # Per-account features are computed once instead of once per pair
+        link_index = LinkIndex()
+        for i, result in enumerate(results):
+            link_index.add(i, result.links)
+        link_scores = link_index.overlaps()
+        signatures = [self.matcher.stylometry_signature(result) for result in results]
+        bio_embeddings = self._bio_embeddings(results)
+
+        pairs = sorted(self.candidate_pairs(results, avatar_hashes, link_index, signatures))
+        stylometry_scores = self._stylometry_scores(signatures, pairs)
+
+        disjoint_set = _DisjointSet(len(results))
+        edge_scores: Dict[Tuple[int, int], float] = {}
+
+        for (i, j), stylometry in zip(pairs, stylometry_scores):
+            result1, result2 = results[i], results[j]
+            scores = {}
+
+            if result1.username and result2.username:
+                scores['username'] = self.matcher.username_similarity(result1.username, result2.username)
+            else:
+                scores['username'] = 0.0
+
+            scores['avatar'] = self.matcher.avatar_similarity(avatar_hashes[i], avatar_hashes[j])
+
+            if result1.bio and result2.bio and result1.bio == result2.bio:
+                scores['bio'] = 1.0
+            elif i in bio_embeddings and j in bio_embeddings:
+                scores['bio'] = float(max(0.0, min(1.0, np.dot(bio_embeddings[i], bio_embeddings[j]))))
+            else:
+                scores['bio'] = 0.0
+
+            scores['stylometry'] = float(stylometry)
+
+            scores['links'] = link_scores.get((i, j), 0.0)
+
+            score = self.matcher.weighted_score(scores, result1, result2, query_inputs)
+            if score >= self.threshold:
+                disjoint_set.union(i, j)
+                edge_scores[(i, j)] = score
+
+        # Group accounts by their root and keep clusters with more than one member
+        groups: Dict[int, List[int]] = defaultdict(list)
+        for i in range(len(results)):
+            groups[disjoint_set.find(i)].append(i)
+
+        group_scores: Dict[int, List[float]] = defaultdict(list)
+        for (i, _), score in edge_scores.items():
+            group_scores[disjoint_set.find(i)].append(score)
+
+        clusters = []
+        for root, members in groups.items():
+            if len(members) < 2:
+                continue
+            scores = group_scores[root]
+            clusters.append(IdentityCluster(
+                cluster_id=len(clusters),
+                members=[
+                    IdentityClusterMember(
+                        platform=results[i].platform,
+                        username=results[i].username,
+                        profile_url=results[i].profile_url
+                    )
+                    for i in members
+                ],
+                confidence=float(np.mean(scores)) if scores else 0.0
+            ))
+
+        return clusters
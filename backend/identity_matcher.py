@@ -11,34 +11,39 @@ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
 FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
 """
 
+import os
 import re
 import difflib
-from typing import List, Dict, Optional
-from PIL import Image
+from typing import List, Dict, Optional, Set
 import imagehash
-import httpx
 from sentence_transformers import SentenceTransformer
 import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
-import nltk
 from collections import Counter
 import hashlib
+from avatar_pipeline import AvatarHasher
+from avatar_index import AvatarIndex
+from minhash import MinHasher
+from link_index import normalize_link
+from records import AccountRecord
 
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt', quiet=True)
-
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords', quiet=True)
+# Words and standalone punctuation, matching what word_tokenize keeps for stylometry
+_TOKEN_RE = re.compile(r"\w+(?:'\w+)?|[^\w\s]")
+_WHITESPACE_RE = re.compile(r'\s+')
 
 
 class IdentityMatcher:
     def __init__(self):
         self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-        self.avatar_cache: Dict[str, str] = {}
+        self.avatar_hasher = AvatarHasher()
+        self.avatar_cache = self.avatar_hasher.cache
+        self.avatar_index = AvatarIndex(os.getenv('AVATAR_INDEX_PATH') or None)
+        self.avatar_match_distance = int(os.getenv('AVATAR_MATCH_DISTANCE', '10'))
+        self.minhasher = MinHasher(num_perm=128, bands=32)
+        # Accounts at or below this query confidence are discarded before analysis
+        self.min_confidence = float(os.getenv('MIN_CONFIDENCE', '0'))
+        # Keep at most this many accounts per platform, best first (0 keeps all)
+        self.max_results_per_platform = int(os.getenv('MAX_RESULTS_PER_PLATFORM', '0'))
     
     def normalize_username(self, username: str) -> str:
         """Normalize username for comparison"""
@@ -70,30 +75,103 @@ class IdentityMatcher:
         
         return similarity
     
-    async def fetch_avatar_hash(self, avatar_url: Optional[str]) -> Optional[str]:
-        """Fetch avatar and compute perceptual hash"""
-        if not avatar_url:
-            return None
+    def query_confidence(self, result: AccountRecord, query_inputs: 'QueryInputs') -> float:
+        """Score how well a scraped account matches the query, starting from the scraper's confidence"""
+        confidence = result.confidence_score
+        
+        # STRICT name matching - verify ALL words are present
+        if query_inputs.name and result.profile_name:
+            name_lower = query_inputs.name.lower().strip()
+            name_parts = [p.strip() for p in name_lower.split() if p.strip()]
+            profile_lower = result.profile_name.lower()
+            bio_lower = (result.bio or '').lower()
+            combined_text = f"{profile_lower} {bio_lower}"
+            
+            # Check if ALL name parts are present (word-for-word)
+            if len(name_parts) > 0:
+                all_parts_match = all(part in combined_text for part in name_parts)
+                
+                if all_parts_match:
+                    # Exact full name match
+                    if name_lower in profile_lower or name_lower in bio_lower:
+                        confidence = min(1.0, confidence + 0.2)
+                    # All words present
+                    else:
+                        confidence = min(1.0, confidence + 0.1)
+                else:
+                    # Not all words match - set confidence to 0
+                    confidence = 0.0
+        
+        # Username match
+        if result.username and query_inputs.usernames:
+            for q_username in query_inputs.usernames:
+                confidence = max(confidence, self.username_similarity(q_username, result.username))
         
-        # Check cache
-        if avatar_url in self.avatar_cache:
-            return self.avatar_cache[avatar_url]
+        # Email match
+        if query_inputs.email and result.bio:
+            if query_inputs.email.lower() in result.bio.lower():
+                confidence = min(1.0, confidence + 0.15)
         
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(avatar_url)
-                if response.status_code == 200:
-                    from io import BytesIO
-                    img = Image.open(BytesIO(response.content))
-                    # Resize for consistent hashing
-                    img = img.resize((256, 256))
-                    phash = str(imagehash.phash(img))
-                    self.avatar_cache[avatar_url] = phash
-                    return phash
-        except Exception:
-            pass
-        
-        return None
+        return confidence
+    
+    def select_accounts(
+        self,
+        results: List[AccountRecord],
+        query_inputs: 'QueryInputs'
+    ) -> Dict[str, List[AccountRecord]]:
+        """
+        Score results against the query and keep the accepted ones, grouped by platform.
+        
+        Results the scraper already gave zero confidence are dropped without scoring.
+        Accepted results have their confidence_score updated and are sorted best first,
+        capped at max_results_per_platform.
+        """
+        accepted: Dict[str, List[AccountRecord]] = {}
+        for result in results:
+            # Scrapers set confidence > 0 only when the name matched
+            if result.confidence_score <= 0.0:
+                continue
+            
+            result.confidence_score = self.query_confidence(result, query_inputs)
+            if result.confidence_score <= self.min_confidence:
+                continue
+            accepted.setdefault(result.platform.value, []).append(result)
+        
+        for platform_key, platform_results in accepted.items():
+            platform_results.sort(key=lambda x: x.confidence_score, reverse=True)
+            if self.max_results_per_platform > 0:
+                del platform_results[self.max_results_per_platform:]
+        
+        return accepted
+    
+    async def fetch_avatar_hash(self, avatar_url: Optional[str]) -> Optional[str]:
+        """Fetch avatar and compute perceptual hash"""
+        return await self.avatar_hasher.hash(avatar_url)
+    
+    async def fetch_avatar_hashes(self, avatar_urls: List[Optional[str]]) -> List[Optional[str]]:
+        """Fetch and hash several avatars concurrently"""
+        return await self.avatar_hasher.hash_many(avatar_urls)
+    
+    async def index_avatars(self, results: List[AccountRecord]) -> List[Optional[str]]:
+        """Hash the avatars of these accounts and add them to the avatar index"""
+        hashes = await self.fetch_avatar_hashes([result.avatar_url for result in results])
+        for result, phash in zip(results, hashes):
+            if phash:
+                self.avatar_index.add(phash, result.profile_url)
+        return hashes
+    
+    def find_similar_avatars(
+        self,
+        avatar_hash: Optional[str],
+        max_distance: Optional[int] = None,
+        refs: Optional[Set[str]] = None
+    ) -> List[tuple]:
+        """Find indexed accounts whose avatar is within max_distance bits of this hash, among refs if given"""
+        if not avatar_hash:
+            return []
+        if max_distance is None:
+            max_distance = self.avatar_match_distance
+        return self.avatar_index.query(avatar_hash, max_distance, refs)
     
     def avatar_similarity(self, hash1: Optional[str], hash2: Optional[str]) -> float:
         """Compare avatar perceptual hashes"""
@@ -130,62 +208,57 @@ class IdentityMatcher:
             return 0.0
     
     def extract_ngrams(self, text: str, n: int = 3) -> List[str]:
-        """Extract n-grams from text"""
+        """Extract word n-grams from text"""
         if not text:
             return []
         
-        words = nltk.word_tokenize(text.lower())
-        ngrams = []
-        for i in range(len(words) - n + 1):
-            ngrams.append(' '.join(words[i:i+n]))
-        return ngrams
+        words = _TOKEN_RE.findall(text.lower())
+        return [' '.join(words[i:i+n]) for i in range(len(words) - n + 1)]
+    
+    def extract_char_ngrams(self, text: str, n: int = 4) -> List[str]:
+        """Extract character n-grams from whitespace-collapsed text"""
+        if not text:
+            return []
+        
+        text = _WHITESPACE_RE.sub(' ', text.lower()).strip()
+        return [text[i:i+n] for i in range(len(text) - n + 1)]
+    
+    def stylometry_signature_from_texts(self, texts: List[str]) -> np.ndarray:
+        """MinHash signature over word trigrams and character 4-grams"""
+        combined = ' '.join(text for text in texts if text)
+        tokens = ['w:' + gram for gram in self.extract_ngrams(combined, n=3)]
+        tokens.extend('c:' + gram for gram in self.extract_char_ngrams(combined, n=4))
+        return self.minhasher.signature(tokens)
+    
+    def stylometry_signature(self, result: AccountRecord) -> np.ndarray:
+        """Return the account's stylometry signature, computing it on first use"""
+        signature = result.stylometry_signature
+        if signature is None:
+            signature = self.stylometry_signature_from_texts(self.account_texts(result))
+            result.stylometry_signature = signature
+        return signature
     
     def stylometry_similarity(self, texts1: List[str], texts2: List[str]) -> float:
         """Calculate writing style similarity using n-gram stylometry"""
         if not texts1 or not texts2:
             return 0.0
         
-        # Combine all texts
-        combined1 = ' '.join(texts1)
-        combined2 = ' '.join(texts2)
-        
-        if not combined1 or not combined2:
-            return 0.0
-        
-        # Extract n-grams
-        ngrams1 = self.extract_ngrams(combined1, n=3)
-        ngrams2 = self.extract_ngrams(combined2, n=3)
-        
-        if not ngrams1 or not ngrams2:
-            return 0.0
-        
-        # Calculate Jaccard similarity
-        set1 = set(ngrams1)
-        set2 = set(ngrams2)
-        
-        intersection = len(set1 & set2)
-        union = len(set1 | set2)
-        
-        if union == 0:
-            return 0.0
-        
-        return intersection / union
+        return self.minhasher.similarity(
+            self.stylometry_signature_from_texts(texts1),
+            self.stylometry_signature_from_texts(texts2)
+        )
+    
+    def normalize_url(self, url: str) -> str:
+        """Normalize a URL for link comparison"""
+        return normalize_link(url)
     
     def link_overlap(self, links1: List[str], links2: List[str]) -> float:
         """Calculate link overlap between profiles"""
         if not links1 or not links2:
             return 0.0
         
-        # Normalize URLs
-        def normalize_url(url: str) -> str:
-            url = url.lower().strip()
-            url = re.sub(r'^https?://', '', url)
-            url = re.sub(r'^www\.', '', url)
-            url = url.rstrip('/')
-            return url
-        
-        norm_links1 = set(normalize_url(link) for link in links1 if link)
-        norm_links2 = set(normalize_url(link) for link in links2 if link)
+        norm_links1 = set(normalize_link(link) for link in links1 if link)
+        norm_links2 = set(normalize_link(link) for link in links2 if link)
         
         if not norm_links1 or not norm_links2:
             return 0.0
@@ -198,10 +271,43 @@ class IdentityMatcher:
         
         return intersection / union
     
+    def account_texts(self, result: AccountRecord) -> List[str]:
+        """Collect the texts used for stylometry from an account"""
+        return [post.content for post in result.posts[:10]] + \
+               [comment.content for comment in result.comments[:10]]
+    
+    def weighted_score(
+        self,
+        scores: Dict[str, float],
+        result1: AccountRecord,
+        result2: AccountRecord,
+        query_inputs: 'QueryInputs'
+    ) -> float:
+        """Combine per-factor similarity scores into an identity confidence"""
+        weights = {
+            'username': 0.30,
+            'avatar': 0.25,
+            'bio': 0.20,
+            'stylometry': 0.15,
+            'links': 0.10
+        }
+        
+        overall_score = sum(scores[key] * weights[key] for key in weights)
+        
+        # Boost if username matches query
+        if query_inputs.usernames:
+            for q_username in query_inputs.usernames:
+                if result1.username and self.username_similarity(q_username, result1.username) > 0.8:
+                    overall_score = min(1.0, overall_score + 0.1)
+                if result2.username and self.username_similarity(q_username, result2.username) > 0.8:
+                    overall_score = min(1.0, overall_score + 0.1)
+        
+        return float(max(0.0, min(1.0, overall_score)))
+    
     async def compute_identity_confidence(
         self,
-        result1: 'FootprintResult',
-        result2: 'FootprintResult',
+        result1: AccountRecord,
+        result2: AccountRecord,
         query_inputs: 'QueryInputs'
     ) -> float:
         """Compute overall identity confidence score between two results"""
@@ -214,41 +320,19 @@ class IdentityMatcher:
             scores['username'] = 0.0
         
         # Avatar similarity
-        avatar_hash1 = await self.fetch_avatar_hash(result1.avatar_url)
-        avatar_hash2 = await self.fetch_avatar_hash(result2.avatar_url)
+        avatar_hash1, avatar_hash2 = await self.fetch_avatar_hashes([result1.avatar_url, result2.avatar_url])
         scores['avatar'] = self.avatar_similarity(avatar_hash1, avatar_hash2)
         
         # Bio similarity
         scores['bio'] = self.bio_similarity(result1.bio, result2.bio)
         
         # Stylometry (writing style)
-        texts1 = [post.get('content', '') for post in result1.posts[:10]] + \
-                 [comment.get('content', '') for comment in result1.comments[:10]]
-        texts2 = [post.get('content', '') for post in result2.posts[:10]] + \
-                 [comment.get('content', '') for comment in result2.comments[:10]]
-        scores['stylometry'] = self.stylometry_similarity(texts1, texts2)
+        scores['stylometry'] = self.minhasher.similarity(
+            self.stylometry_signature(result1),
+            self.stylometry_signature(result2)
+        )
         
         # Link overlap
         scores['links'] = self.link_overlap(result1.links, result2.links)
         
-        # Weighted average
-        weights = {
-            'username': 0.30,
-            'avatar': 0.25,
-            'bio': 0.20,
-            'stylometry': 0.15,
-            'links': 0.10
-        }
-        
-        overall_score = sum(scores[key] * weights[key] for key in weights)
-        
-        # Boost if username matches query
-        if query_inputs.usernames:
-            for q_username in query_inputs.usernames:
-                if result1.username and self.username_similarity(q_username, result1.username) > 0.8:
-                    overall_score = min(1.0, overall_score + 0.1)
-                if result2.username and self.username_similarity(q_username, result2.username) > 0.8:
-                    overall_score = min(1.0, overall_score + 0.1)
-        
-        return float(max(0.0, min(1.0, overall_score)))
-
+        return self.weighted_score(scores, result1, result2, query_inputs)
@@ -0,0 +1,87 @@
+"""
+Copyright (c) 2024 FootprintScan. All Rights Reserved.
+
+This software and associated documentation files (the "Software") are proprietary
+and confidential. Unauthorized copying, modification, distribution, or use of
+this Software, via any medium, is strictly prohibited without express written
+permission from the copyright holder.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+"""
+
+import re
+from typing import Dict, Iterable, List, Tuple, Union
+
+# Endings accepted after a term, and after a term whose final 'e' was dropped
+_SUFFIXES = r'(?:e?s|e?d|ing|ish|e?rs?)?'
+_E_DROPPED_SUFFIXES = r'(?:ings?|ed|ish|ers?)'
+
+
+class KeywordMatcher:
+    """Matches keywords from several categories in a single regex pass.
+
+    All terms are compiled into one alternation anchored on word boundaries,
+    so 'left' no longer matches inside 'leftover'. Common inflections are
+    still accepted: plurals and -ed, -ing, -ish and -er endings ('racists',
+    'hated', 'foolish'), with a final 'e' dropped before a vowel ending
+    ('hating'). Each distinct term counts once per text, as the substring scan
+    it replaces did. Terms may be given as a mapping of term to weight; plain
+    iterables weigh 1 per term.
+    """
+
+    def __init__(self, categories: Dict[str, Union[Iterable[str], Dict[str, float]]]):
+        self.categories: Tuple[str, ...] = tuple(categories)
+        self._term_weights: Dict[str, List[Tuple[str, float]]] = {}
+        for category, terms in categories.items():
+            weights = terms if isinstance(terms, dict) else dict.fromkeys(terms, 1.0)
+            for term, weight in weights.items():
+                term = ' '.join(term.lower().split())
+                if term:
+                    self._term_weights.setdefault(term, []).append((category, float(weight)))
+
+        # Longest terms first so multi-word phrases win over their prefixes
+        terms = sorted(self._term_weights, key=len, reverse=True)
+        if not terms:
+            self._pattern = None
+            return
+        pattern = r'\b(?:(' + self._alternation(terms) + r')' + _SUFFIXES
+        # Terms ending in 'e' lose it before a vowel ending: 'hate' -> 'hating'
+        stems = [term[:-1] for term in terms if term.endswith('e') and len(term) > 3]
+        if stems:
+            pattern += r'|(' + self._alternation(stems) + r')' + _E_DROPPED_SUFFIXES
+        self._pattern = re.compile(pattern + r')\b')
+
+    @staticmethod
+    def _alternation(terms: List[str]) -> str:
+        return '|'.join(r'\s+'.join(re.escape(word) for word in term.split()) for term in terms)
+
+    def _distinct_terms(self, text_lower: str) -> List[str]:
+        terms: List[str] = []
+        if self._pattern is None or not text_lower:
+            return terms
+
+        seen = set()
+        for match in self._pattern.finditer(text_lower):
+            term = ' '.join((match.group(1) or match.group(2) + 'e').split())
+            if term not in seen:
+                seen.add(term)
+                terms.append(term)
+        return terms
+
+    def match_terms(self, text_lower: str) -> Dict[str, List[str]]:
+        """Return the distinct matched terms per category"""
+        matched: Dict[str, List[str]] = {category: [] for category in self.categories}
+        for term in self._distinct_terms(text_lower):
+            for category, _ in self._term_weights.get(term, ()):
+                matched[category].append(term)
+        return matched
+
+    def scan(self, text_lower: str) -> Dict[str, float]:
+        """Return the summed weight of distinct matched terms per category"""
+        counts = {category: 0.0 for category in self.categories}
+        for term in self._distinct_terms(text_lower):
+            for category, weight in self._term_weights.get(term, ()):
+                counts[category] += weight
+        return counts
@@ -0,0 +1,100 @@
+"""
+Copyright (c) 2024 FootprintScan. All Rights Reserved.
+
+This software and associated documentation files (the "Software") are proprietary
+and confidential. Unauthorized copying, modification, distribution, or use of
+this Software, via any medium, is strictly prohibited without express written
+permission from the copyright holder.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+from keyword_matcher import KeywordMatcher
+
+DEFAULT_LEXICON_PATH = os.path.join(os.path.dirname(__file__), 'lexicons', 'risk_lexicon.json')
+
+
+class Lexicon:
+    """An immutable, compiled risk lexicon.
+
+    The file format is::
+
+        {
+          "version": "2024.1",
+          "categories": {
+            "toxicity": {"multiplier": 10, "terms": ["idiot", "shut up"]},
+            "nsfw": {"multiplier": 20, "terms": {"porn": 1.0, "adult": 0.5}}
+          }
+        }
+
+    Terms may be a list (weight 1 each) or a mapping of term to weight, and
+    may be multi-word phrases.
+    """
+
+    def __init__(self, version: str, multipliers: Dict[str, float], matcher: KeywordMatcher):
+        self.version = version
+        self.multipliers = dict(multipliers)
+        self.matcher = matcher
+
+    @classmethod
+    def from_file(cls, path: str) -> 'Lexicon':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        categories = data['categories']
+        multipliers = {name: float(category.get('multiplier', 1)) for name, category in categories.items()}
+        matcher = KeywordMatcher({name: category.get('terms', []) for name, category in categories.items()})
+        return cls(str(data.get('version', 'unversioned')), multipliers, matcher)
+
+
+class LexiconStore:
+    """Holds the current Lexicon and swaps in a new one when its file changes.
+
+    The file's mtime is checked at most every check_interval seconds. A new
+    Lexicon is compiled off to the side and then published with a single
+    attribute assignment, so readers always see a complete lexicon. A file
+    that fails to load leaves the previous lexicon in place.
+    """
+
+    def __init__(self, path: Optional[str] = None, check_interval: float = 5.0):
+        self.path = path or DEFAULT_LEXICON_PATH
+        self.check_interval = check_interval
+        self._reload_lock = threading.Lock()
+        self._mtime = os.path.getmtime(self.path)
+        self._checked_at = time.monotonic()
+        self._lexicon = Lexicon.from_file(self.path)
+
+    @property
+    def current(self) -> Lexicon:
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self._maybe_reload()
+        return self._lexicon
+
+    def _maybe_reload(self):
+        # Only one thread checks; others keep using the current lexicon meanwhile
+        if not self._reload_lock.acquire(blocking=False):
+            return
+        try:
+            self._checked_at = time.monotonic()
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                return
+            if mtime == self._mtime:
+                return
+            self._mtime = mtime
+            try:
+                lexicon = Lexicon.from_file(self.path)
+            except Exception as e:
+                print(f"Failed to reload lexicon {self.path}: {e}")
+                return
+            self._lexicon = lexicon
+        finally:
+            self._reload_lock.release()
@@ -0,0 +1,132 @@
+"""
+Copyright (c) 2024 FootprintScan. All Rights Reserved.
+
+This software and associated documentation files (the "Software") are proprietary
+and confidential. Unauthorized copying, modification, distribution, or use of
+this Software, via any medium, is strictly prohibited without express written
+permission from the copyright holder.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+"""
+
+import re
+from collections import defaultdict
+from functools import lru_cache
+from itertools import combinations
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+from urllib.parse import SplitResult, parse_qsl, unquote, urlencode, urlsplit
+
+_SCHEME_RE = re.compile(r'^[a-z][a-z0-9+.-]*://')
+_WWW_RE = re.compile(r'^www\d*\.')
+_TRACKING_PARAM_RE = re.compile(
+    r'^(utm_\w+|fbclid|gclid|dclid|gclsrc|msclkid|yclid|mc_cid|mc_eid|igshid|igsh|'
+    r'_ga|_gl|ref|ref_src|ref_url|si|feature|spm|s_cid|trk|trkinfo)$'
+)
+
+# Redirect wrappers: (host, path prefix) -> query parameter holding the real target
+_REDIRECT_WRAPPERS = {
+    ('google.com', '/url'): ('q', 'url'),
+    ('l.facebook.com', '/l.php'): ('u',),
+    ('lm.facebook.com', '/l.php'): ('u',),
+    ('l.instagram.com', '/'): ('u',),
+    ('out.reddit.com', '/'): ('url',),
+    ('youtube.com', '/redirect'): ('q',),
+    ('linkedin.com', '/redir/redirect'): ('url',),
+    ('href.li', '/'): (),
+}
+
+
+def _unwrap_redirect(host: str, path: str, query: str, raw: str) -> Optional[str]:
+    """Return the wrapped target URL if this is a known redirect wrapper"""
+    for (wrapper_host, prefix), params in _REDIRECT_WRAPPERS.items():
+        if host != wrapper_host or not path.startswith(prefix):
+            continue
+        if not params:
+            # href.li style: the target follows the '?'
+            return unquote(raw.split('?', 1)[1]) if '?' in raw else None
+        values = dict(parse_qsl(query))
+        for param in params:
+            if values.get(param):
+                return values[param]
+    return None
+
+
+def _split_link(url: str) -> Tuple[SplitResult, str]:
+    """Split a URL, adding a scheme if it has none, and return it with its host minus 'www.'"""
+    if not _SCHEME_RE.match(url):
+        url = 'http://' + url
+    parts = urlsplit(url)
+    return parts, _WWW_RE.sub('', parts.hostname or '')
+
+
+@lru_cache(maxsize=65536)
+def normalize_link(url: str) -> str:
+    """Normalize a URL so equivalent links compare equal.
+
+    Drops the scheme, 'www.', fragments, trailing slashes and tracking
+    parameters, and follows known redirect wrappers to their target.
+    """
+    url = url.strip().lower()
+    try:
+        for _ in range(3):
+            parts, host = _split_link(url)
+            target = _unwrap_redirect(host, parts.path or '/', parts.query, url)
+            if not target:
+                break
+            url = target.strip().lower()
+        else:
+            # Still wrapped after three hops; describe the last target
+            parts, host = _split_link(url)
+    except ValueError:
+        # Malformed links, e.g. an unclosed IPv6 host, are compared as plain strings
+        return url
+
+    params = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _TRACKING_PARAM_RE.match(key)
+    ]
+    try:
+        port = f":{parts.port}" if parts.port and parts.port not in (80, 443) else ''
+    except ValueError:
+        port = ''
+    normalized = host + port + parts.path.rstrip('/')
+    if params:
+        normalized += '?' + urlencode(sorted(params))
+    return normalized
+
+
+class LinkIndex:
+    """Inverted index from normalized link to the accounts that share it, built per scan"""
+
+    def __init__(self):
+        self.postings: Dict[str, Set[Hashable]] = defaultdict(set)
+        self.account_links: Dict[Hashable, Set[str]] = defaultdict(set)
+
+    def add(self, account_id: Hashable, links: Iterable[str]) -> Set[str]:
+        """Index an account's links and return their normalized forms"""
+        normalized = {normalize_link(link) for link in links if link}
+        normalized.discard('')
+        for link in normalized:
+            self.postings[link].add(account_id)
+            self.account_links[account_id].add(link)
+        return normalized
+
+    def overlaps(self, max_posting: Optional[int] = None) -> Dict[Tuple[Hashable, Hashable], float]:
+        """Jaccard link overlap for every account pair sharing a link, in one pass over the postings"""
+        shared: Dict[Tuple[Hashable, Hashable], int] = defaultdict(int)
+        for accounts in self.postings.values():
+            if len(accounts) < 2 or (max_posting and len(accounts) > max_posting):
+                continue
+            for pair in combinations(sorted(accounts), 2):
+                shared[pair] += 1
+
+        return {
+            (a, b): count / (len(self.account_links[a]) + len(self.account_links[b]) - count)
+            for (a, b), count in shared.items()
+        }
+
+    def shared_postings(self) -> List[Set[Hashable]]:
+        """Postings lists with more than one account, for use as blocking keys"""
+        return [accounts for accounts in self.postings.values() if len(accounts) > 1]
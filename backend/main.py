@@ -13,24 +13,34 @@ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
 
 import os
 import uuid
-from datetime import datetime
-from typing import Dict, List
-from fastapi import FastAPI, HTTPException
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Literal, Optional, Set, Tuple
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from serialization import ModelJSONResponse, field_projection
+from compression import CompressionMiddleware
 from dotenv import load_dotenv
-from models import QueryInputs, ScanResponse, FootprintResult, Platform, RiskAnalysis, RiskMetrics, ConfidenceScore, TimelineEntry
+from models import QueryInputs, ScanResponse, Platform, RiskAnalysis, RiskMetrics, ConfidenceScore, TimelineEntry, TimelinePage, TimelineHistogram, ScanHistory
+from records import AccountRecord
 from scraper_manager import ScraperManager
 from identity_matcher import IdentityMatcher
+from identity_linker import IdentityLinker
 from risk_analyzer import RiskAnalyzer
 from timeline_builder import TimelineBuilder
+from analysis_executor import AnalysisExecutor
+from scan_store import REPORT_SECTIONS, ScanStore, StoredScan
+from scan_database import ScanDatabase
+import exporter
 
 load_dotenv()
 
 app = FastAPI(
     title="FootprintScan API",
     description="Digital footprint scanning API",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ModelJSONResponse
 )
 
 # CORS configuration
@@ -43,11 +53,44 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses for clients that accept zstd, brotli or gzip
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+)
+
 # Initialize components
 scraper_manager = ScraperManager()
 identity_matcher = IdentityMatcher()
+identity_linker = IdentityLinker(identity_matcher)
 risk_analyzer = RiskAnalyzer()
 timeline_builder = TimelineBuilder()
+# Finished scans are persisted to SQLite unless SCAN_DB_PATH is set empty
+scan_db_path = os.getenv('SCAN_DB_PATH', 'scans.db')
+scan_store = ScanStore(
+    maxsize=int(os.getenv('SCAN_STORE_SIZE', '100')),
+    database=ScanDatabase(
+        scan_db_path,
+        retention_days=float(os.getenv('SCAN_RETENTION_DAYS', '30'))
+    ) if scan_db_path else None
+)
+export_batch_rows = int(os.getenv('EXPORT_BATCH_ROWS', '1000'))
+analysis_executor = AnalysisExecutor(
+    max_concurrent=int(os.getenv('ANALYSIS_CONCURRENCY', '2')),
+    small_job_size=int(os.getenv('ANALYSIS_SMALL_JOB_ITEMS', '200')),
+    small_workers=int(os.getenv('ANALYSIS_SMALL_WORKERS', '2'))
+)
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    analysis_executor.close()
+    scan_store.close()
+    await identity_matcher.avatar_hasher.aclose()
+    identity_matcher.avatar_index.close()
+    risk_analyzer.sentiment_scorer.close()
+    if risk_analyzer.risk_model is not None:
+        risk_analyzer.risk_model.close()
 
 
 @app.get("/")
@@ -64,9 +107,165 @@ async def health():
     return {"status": "healthy"}
 
 
+@app.get("/stats")
+async def stats():
+    """Queue, cache and model metrics for the analysis pipeline"""
+    return {
+        "analysis": analysis_executor.stats(),
+        "risk_cache": risk_analyzer.cache_stats(),
+        "risk_model": risk_analyzer.model_stats(),
+        "avatar_cache": identity_matcher.avatar_cache.stats(),
+        # Counting persisted scans queries the database, which a running save holds locked
+        "scan_store": await run_in_threadpool(scan_store.stats)
+    }
+
+
+def build_scan_response(
+    query_inputs: QueryInputs,
+    all_results: List[AccountRecord],
+    footprints: Dict[str, List[AccountRecord]],
+    avatar_hashes: List[Optional[str]],
+    sections: Set[str],
+    flagged_only: bool = False
+) -> ScanResponse:
+    """
+    Post-scrape analysis stage; CPU bound, so it runs in the analysis executor.
+    
+    The scan is stored whole; the reply is built from it by scan_reply.
+    """
+    scan_id = str(uuid.uuid4())
+    accepted_results = [r for results in footprints.values() for r in results]
+    
+    confidence_scores: List[ConfidenceScore] = []
+    for result in accepted_results:
+        confidence_scores.append(ConfidenceScore.model_construct(
+            platform=result.platform,
+            username=result.username,
+            score=result.confidence_score,
+            factors={
+                'name_match': 0.3 if query_inputs.name and result.profile_name else 0,
+                'username_match': 0.2 if result.username else 0,
+                'email_match': 0.1 if query_inputs.email else 0,
+                'base_confidence': result.confidence_score
+            }
+        ))
+    
+    # Cluster matched accounts into identities
+    identity_clusters = identity_linker.cluster(accepted_results, avatar_hashes, query_inputs)
+    
+    # Perform risk analysis on posts and comments of accepted accounts in one columnar pass.
+    # Near-duplicate texts are collapsed and only one of each group is analyzed.
+    lexicon_version = risk_analyzer.lexicon_version
+    items, metric_columns, duplicates = risk_analyzer.analyze_scan(accepted_results)
+    flagged, flags = risk_analyzer.flag_columns(metric_columns)
+    metric_rows = risk_analyzer.metric_rows(metric_columns)
+    
+    risk_analyses: List[RiskAnalysis] = []
+    for row, (result, item, content) in enumerate(items):
+        risk_analyses.append(RiskAnalysis.model_construct(
+            post_id=item.url or str(uuid.uuid4()),
+            platform=result.platform,
+            content=content[:500],  # Truncate for storage
+            timestamp=datetime.fromtimestamp(item.epoch, tz=timezone.utc) if item.epoch is not None else None,
+            url=item.url,
+            metrics=RiskMetrics.model_construct(**metric_rows[row]),
+            flagged=bool(flagged[row]),
+            flags=flags[row],
+            duplicates=[dup.url or str(uuid.uuid4()) for dup in duplicates[row]]
+        ))
+    
+    # Build timeline; its entries are only materialized for replies that ask for them
+    timeline_index = timeline_builder.build_index(footprints, [ra.model_dump() for ra in risk_analyses])
+    
+    # Create response; every part was built here, so it is not validated again
+    response = ScanResponse.model_construct(
+        accounts_found=len(all_results),
+        # Internal records become API models only here
+        footprints={k: [r.to_model() for r in v] for k, v in footprints.items()},
+        confidence_scores=confidence_scores,
+        risk_analysis=risk_analyses,
+        identity_clusters=identity_clusters,
+        scan_id=scan_id,
+        scan_timestamp=datetime.now()
+    )
+    
+    # Keep the scan for follow-up queries such as the paginated timeline, export and history
+    stored = StoredScan(response, timeline_index, query_inputs, lexicon_version)
+    scan_store.put(stored)
+    
+    return scan_reply(stored, sections, flagged_only)
+
+
+def scan_reply(stored: StoredScan, sections: Set[str], flagged_only: bool = False) -> ScanResponse:
+    """
+    A stored scan as a ScanResponse with the parts named in sections.
+    
+    The reply is a shallow copy so that filtering it leaves the stored scan
+    whole. The timeline, the summary and the export are only built on request.
+    """
+    updates = {}
+    if 'timeline' in sections:
+        updates['timeline'] = stored.timeline.entries()
+    if flagged_only:
+        updates['risk_analysis'] = [ra for ra in stored.response.risk_analysis if ra.flagged]
+    if 'summary' in sections:
+        updates['summary'] = stored.summary()
+    if 'exportable_report' in sections:
+        updates['exportable_report'] = stored.report()
+    
+    return stored.response.model_copy(update=updates)
+
+
+# Optional sections of ScanResponse and the include= names that add them
+OPTIONAL_SECTIONS = {'summary': 'summary', 'report': 'exportable_report'}
+
+
+def _projection(model: type, fields: Optional[str], extra_fields: Iterable[str] = ()) -> Optional[Dict[str, Any]]:
+    """Parse a fields= parameter, answering 400 for unknown fields"""
+    if not fields:
+        return None
+    try:
+        return field_projection(model, fields, extra_fields) or None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _scan_view(fields: Optional[str], include: Optional[str]) -> Tuple[Optional[Dict[str, Any]], Set[str]]:
+    """The projection and the ScanResponse sections to build for fields= and include="""
+    projection = _projection(ScanResponse, fields)
+    sections = set(projection) if projection else set(ScanResponse.model_fields) - set(OPTIONAL_SECTIONS.values())
+    for name in filter(None, (name.strip() for name in (include or '').split(','))):
+        if name not in OPTIONAL_SECTIONS:
+            raise HTTPException(status_code=400, detail=f"Unknown include '{name}'")
+        sections.add(OPTIONAL_SECTIONS[name])
+    if projection:
+        # The scan_id is always returned so the scan can be queried further
+        for name in sections | {'scan_id'}:
+            projection.setdefault(name, True)
+    return projection, sections
+
+
+async def _stored_scan(scan_id: str) -> StoredScan:
+    """A stored scan from memory, or else from the scan database off the event loop; 404 if unknown"""
+    stored = scan_store.get_cached(scan_id)
+    if stored is None:
+        stored = await run_in_threadpool(scan_store.get, scan_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    return stored
+
+
 @app.post("/scan", response_model=ScanResponse)
-async def scan(query_inputs: QueryInputs):
+async def scan(
+    query_inputs: QueryInputs,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, dotted for nested ones, e.g. summary,risk_analysis.post_id"),
+    include: Optional[str] = Query(None, description="Comma-separated optional sections to add: summary, report"),
+    flagged_only: bool = Query(False, description="Return only flagged risk_analysis items")
+):
     """Main scanning endpoint"""
+    # Work out which parts of the response are wanted before doing any work
+    projection, sections = _scan_view(fields, include)
+    
     try:
         # Validate inputs
         if not query_inputs.name and not query_inputs.usernames and not query_inputs.email:
@@ -75,167 +274,157 @@ async def scan(query_inputs: QueryInputs):
         # Run all scrapers in parallel
         all_results = await scraper_manager.run_all_scrapers(query_inputs)
         
-        # Group results by platform and filter by confidence
-        footprints: Dict[str, List[FootprintResult]] = {}
-        for result in all_results:
-            # Include results with confidence > 0 (meaning name matched)
-            if result.confidence_score <= 0.0:
-                continue
-                
-            platform_key = result.platform.value
-            if platform_key not in footprints:
-                footprints[platform_key] = []
-            footprints[platform_key].append(result)
-        
-        # Sort results by confidence within each platform
-        for platform_key in footprints:
-            footprints[platform_key].sort(key=lambda x: x.confidence_score, reverse=True)
-        
-        # Calculate confidence scores using identity matcher
-        confidence_scores: List[ConfidenceScore] = []
-        for platform_key, results in footprints.items():
-            for result in results:
-                # Calculate confidence based on name and username match
-                confidence = result.confidence_score  # Start with scraper's confidence
-                
-                # STRICT name matching - verify ALL words are present
-                if query_inputs.name and result.profile_name:
-                    name_lower = query_inputs.name.lower().strip()
-                    name_parts = [p.strip() for p in name_lower.split() if p.strip()]
-                    profile_lower = result.profile_name.lower()
-                    bio_lower = (result.bio or '').lower()
-                    combined_text = f"{profile_lower} {bio_lower}"
-                    
-                    # Check if ALL name parts are present (word-for-word)
-                    if len(name_parts) > 0:
-                        all_parts_match = all(part in combined_text for part in name_parts)
-                        
-                        if all_parts_match:
-                            # Exact full name match
-                            if name_lower in profile_lower or name_lower in bio_lower:
-                                confidence = min(1.0, confidence + 0.2)
-                            # All words present
-                            else:
-                                confidence = min(1.0, confidence + 0.1)
-                        else:
-                            # Not all words match - set confidence to 0
-                            confidence = 0.0
-                
-                # Username match
-                if result.username and query_inputs.usernames:
-                    for q_username in query_inputs.usernames:
-                        from identity_matcher import IdentityMatcher
-                        matcher = IdentityMatcher()
-                        similarity = matcher.username_similarity(q_username, result.username)
-                        confidence = max(confidence, similarity)
-                
-                # Email match
-                if query_inputs.email and result.bio:
-                    if query_inputs.email.lower() in result.bio.lower():
-                        confidence = min(1.0, confidence + 0.15)
-                
-                # Update result confidence
-                result.confidence_score = confidence
-                
-                confidence_scores.append(ConfidenceScore(
-                    platform=result.platform,
-                    username=result.username,
-                    score=confidence,
-                    factors={
-                        'name_match': 0.3 if query_inputs.name and result.profile_name else 0,
-                        'username_match': 0.2 if result.username else 0,
-                        'email_match': 0.1 if query_inputs.email else 0,
-                        'base_confidence': result.confidence_score
-                    }
-                ))
-        
-        # Perform risk analysis on all posts and comments
-        risk_analyses: List[RiskAnalysis] = []
-        all_posts = []
-        
-        for result in all_results:
-            # Analyze posts
-            for post in result.posts:
-                content = post.get('content', '') or post.get('title', '')
-                if content:
-                    risk_metrics_dict = risk_analyzer.analyze_risk(content, result.posts)
-                    should_flag, flags = risk_analyzer.should_flag(risk_metrics_dict)
-                    
-                    risk_analyses.append(RiskAnalysis(
-                        post_id=post.get('url', str(uuid.uuid4())),
-                        platform=result.platform,
-                        content=content[:500],  # Truncate for storage
-                        timestamp=datetime.fromtimestamp(post.get('timestamp', datetime.now().timestamp())) if isinstance(post.get('timestamp'), (int, float)) else None,
-                        url=post.get('url'),
-                        metrics=RiskMetrics(**risk_metrics_dict),
-                        flagged=should_flag,
-                        flags=flags
-                    ))
-            
-            # Analyze comments
-            for comment in result.comments:
-                content = comment.get('content', '')
-                if content:
-                    risk_metrics_dict = risk_analyzer.analyze_risk(content, result.comments)
-                    should_flag, flags = risk_analyzer.should_flag(risk_metrics_dict)
-                    
-                    risk_analyses.append(RiskAnalysis(
-                        post_id=comment.get('url', str(uuid.uuid4())),
-                        platform=result.platform,
-                        content=content[:500],
-                        timestamp=datetime.fromtimestamp(comment.get('timestamp', datetime.now().timestamp())) if isinstance(comment.get('timestamp'), (int, float)) else None,
-                        url=comment.get('url'),
-                        metrics=RiskMetrics(**risk_metrics_dict),
-                        flagged=should_flag,
-                        flags=flags
-                    ))
-        
-        # Build timeline
-        timeline = timeline_builder.build_timeline(footprints, [ra.model_dump() for ra in risk_analyses])
+        # Score every result against the query first; only accepted accounts,
+        # best first and capped per platform, go on to the analysis stages
+        footprints: Dict[str, List[AccountRecord]] = await analysis_executor.run(
+            identity_matcher.select_accounts, all_results, query_inputs
+        )
+        accepted_results = [r for results in footprints.values() for r in results]
         
-        # Create exportable report
-        exportable_report = {
-            'scan_id': str(uuid.uuid4()),
-            'scan_timestamp': datetime.now().isoformat(),
-            'query': query_inputs.model_dump(),
-            'summary': {
-                'total_accounts': len(all_results),
-                'total_posts': sum(len(r.posts) for r in all_results),
-                'total_comments': sum(len(r.comments) for r in all_results),
-                'total_flagged': sum(1 for ra in risk_analyses if ra.flagged),
-                'platforms_found': list(footprints.keys())
-            },
-            'footprints': {k: [r.model_dump() for r in v] for k, v in footprints.items()},
-            'confidence_scores': [cs.model_dump() for cs in confidence_scores],
-            'risk_analysis': [ra.model_dump() for ra in risk_analyses],
-            'timeline': [te.model_dump() for te in timeline]
-        }
+        # Avatar downloads are I/O and stay on the event loop (this also fills the avatar index)
+        avatar_hashes = await identity_matcher.index_avatars(accepted_results)
         
-        # Create response
-        scan_id = str(uuid.uuid4())
-        response = ScanResponse(
-            accounts_found=len(all_results),
-            footprints=footprints,
-            confidence_scores=confidence_scores,
-            risk_analysis=risk_analyses,
-            timeline=timeline,
-            exportable_report=exportable_report,
-            scan_id=scan_id,
-            scan_timestamp=datetime.now()
+        # Everything else is CPU work, run off the event loop with bounded concurrency
+        scan_size = sum(len(r.posts) + len(r.comments) for r in accepted_results)
+        response = await analysis_executor.run(
+            build_scan_response, query_inputs, all_results, footprints, avatar_hashes, sections, flagged_only,
+            size=scan_size
         )
-        
-        return response
+        return ModelJSONResponse(response, include=projection)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/scans", response_model=ScanHistory)
+async def scan_history(
+    name: Optional[str] = None,
+    username: Optional[str] = None,
+    email: Optional[str] = None,
+    platform: Optional[Platform] = Query(None, description="Only scans that found an account on this platform"),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """Past scans, most recent first, by the name, username or email that was searched for"""
+    if scan_store.database is None:
+        raise HTTPException(status_code=501, detail="Scan history needs the scan database (SCAN_DB_PATH)")
+    
+    scans = await run_in_threadpool(scan_store.database.find, name, username, email, platform, limit)
+    return ModelJSONResponse(ScanHistory(scans=scans))
+
+
+@app.get("/scan/{scan_id}", response_model=ScanResponse)
+async def get_scan(
+    scan_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, dotted for nested ones, e.g. summary,risk_analysis.post_id"),
+    include: Optional[str] = Query(None, description="Comma-separated optional sections to add: summary, report"),
+    flagged_only: bool = Query(False, description="Return only flagged risk_analysis items")
+):
+    """A stored scan, without scraping again; takes the same fields, include and flagged_only as POST /scan"""
+    projection, sections = _scan_view(fields, include)
+    stored = await _stored_scan(scan_id)
+    response = await analysis_executor.run(scan_reply, stored, sections, flagged_only, size=len(stored.timeline))
+    return ModelJSONResponse(response, include=projection)
+
+
+@app.get("/scan/{scan_id}/timeline", response_model=TimelinePage)
+async def scan_timeline(
+    scan_id: str,
+    from_: Optional[datetime] = Query(None, alias='from', description="Start time, ISO 8601 or epoch seconds"),
+    to: Optional[datetime] = Query(None, description="End time (inclusive), ISO 8601 or epoch seconds"),
+    platform: Optional[Platform] = None,
+    min_risk: Optional[float] = Query(None, ge=0.0, le=100.0),
+    cursor: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. entries.timestamp,entries.risk_score")
+):
+    """Page through a stored scan's timeline, filtered by time range, platform and risk"""
+    projection = _projection(TimelinePage, fields)
+    stored = await _stored_scan(scan_id)
+    
+    entries, next_cursor, total = stored.timeline.query(
+        start_ts=_epoch_seconds(from_),
+        end_ts=_epoch_seconds(to),
+        platform=platform,
+        min_risk=min_risk,
+        cursor=cursor,
+        limit=limit
+    )
+    return ModelJSONResponse(
+        TimelinePage.model_construct(scan_id=scan_id, entries=entries, total=total, next_cursor=next_cursor),
+        include=projection
+    )
+
+
+@app.get("/scan/{scan_id}/timeline/histogram", response_model=TimelineHistogram)
+async def scan_timeline_histogram(
+    scan_id: str,
+    granularity: Literal['day', 'week', 'month'] = 'day',
+    from_: Optional[datetime] = Query(None, alias='from', description="Start time, ISO 8601 or epoch seconds"),
+    to: Optional[datetime] = Query(None, description="End time (inclusive), ISO 8601 or epoch seconds"),
+    platform: Optional[Platform] = None
+):
+    """Event counts and risk per platform per day, week or month for a stored scan's timeline"""
+    stored = await _stored_scan(scan_id)
+    
+    columns = stored.timeline.histogram(granularity, _epoch_seconds(from_), _epoch_seconds(to), platform)
+    return ModelJSONResponse(TimelineHistogram.model_construct(
+        scan_id=scan_id,
+        granularity=granularity,
+        bucket_start=columns['bucket_start'].tolist(),
+        platform=columns['platform'],
+        count=columns['count'].tolist(),
+        mean_risk=columns['mean_risk'].tolist(),
+        max_risk=columns['max_risk'].tolist(),
+        flagged=columns['flagged'].tolist()
+    ))
+
+
+def _epoch_seconds(value: Optional[datetime]) -> Optional[int]:
+    """Epoch seconds for a query datetime; naive values are taken as UTC"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
 @app.get("/export/{scan_id}")
-async def export_scan(scan_id: str):
-    """Export scan results as JSON"""
-    # In a real implementation, this would fetch from a database
-    # For now, return a placeholder
-    return {"message": "Export functionality - scan results should be exported from the /scan endpoint"}
+async def export_scan(
+    scan_id: str,
+    format_: Literal['json', 'ndjson', 'arrow', 'parquet'] = Query('json', alias='format'),
+    table: Literal['footprints', 'risk_analysis', 'timeline'] = Query('risk_analysis', description="Table to export as arrow or parquet"),
+    fields: Optional[str] = Query(None, description="Comma-separated report sections to export, dotted for nested fields (json and ndjson)")
+):
+    """Export scan results as JSON, streamed NDJSON, or one columnar table as Arrow IPC or Parquet"""
+    projection = _projection(ScanResponse, fields, extra_fields=('query', 'lexicon_version'))
+    unknown = set(projection or ()) - set(REPORT_SECTIONS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown report sections: {', '.join(sorted(unknown))}")
+    if format_ in ('arrow', 'parquet') and projection:
+        raise HTTPException(status_code=400, detail="fields is only supported for json and ndjson exports")
+    
+    stored = await _stored_scan(scan_id)
+    
+    filename = f"footprintscan-{scan_id}"
+    if format_ == 'json':
+        report = await analysis_executor.run(stored.report, projection, size=len(stored.response.risk_analysis))
+        return ModelJSONResponse(
+            content=report,
+            headers={'Content-Disposition': f'attachment; filename="{filename}.json"'}
+        )
+    
+    # The rest stream batch by batch from a worker thread, so memory use does not grow with the scan
+    if format_ == 'ndjson':
+        body = exporter.iter_ndjson(stored, projection, batch_rows=export_batch_rows)
+        filename += '.ndjson'
+    else:
+        body = exporter.iter_table(stored, table, format_, batch_rows=export_batch_rows)
+        filename += f"-{table}.{format_}"
+    return StreamingResponse(
+        body,
+        media_type=exporter.EXPORT_MEDIA_TYPES[format_],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,63 @@
+"""
+Copyright (c) 2024 FootprintScan. All Rights Reserved.
+
+This software and associated documentation files (the "Software") are proprietary
+and confidential. Unauthorized copying, modification, distribution, or use of
+this Software, via any medium, is strictly prohibited without express written
+permission from the copyright holder.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+"""
+
+import zlib
+from typing import Iterable, List, Tuple
+import numpy as np
+
+# Largest prime below 2**32; with 32-bit inputs and coefficients a*x + b fits in uint64
+_PRIME = np.uint64(4294967291)
+_EMPTY = np.uint64(0xFFFFFFFF)
+
+
+class MinHasher:
+    """Fixed-size MinHash signatures over token sets, with LSH banding"""
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 2 ** 32 - 1, size=num_perm, dtype=np.uint64)[:, None]
+        self._b = rng.randint(0, 2 ** 32 - 1, size=num_perm, dtype=np.uint64)[:, None]
+
+    def signature(self, tokens: Iterable[str]) -> np.ndarray:
+        """Compute the MinHash signature of a token set"""
+        values = np.fromiter(
+            {zlib.crc32(token.encode('utf-8')) for token in tokens},
+            dtype=np.uint64
+        )
+        if values.size == 0:
+            return np.full(self.num_perm, _EMPTY, dtype=np.uint64)
+        hashed = (self._a * values[None, :] + self._b) % _PRIME
+        return hashed.min(axis=1)
+
+    def similarity(self, sig1: np.ndarray, sig2: np.ndarray) -> float:
+        """Estimate Jaccard similarity from two signatures"""
+        if self.is_empty(sig1) or self.is_empty(sig2):
+            return 0.0
+        return float(np.count_nonzero(sig1 == sig2)) / self.num_perm
+
+    def is_empty(self, sig: np.ndarray) -> bool:
+        return bool(sig[0] == _EMPTY) and bool(np.all(sig == _EMPTY))
+
+    def band_keys(self, sig: np.ndarray) -> List[Tuple[int, bytes]]:
+        """Split a signature into LSH band keys; equal keys mark candidate pairs"""
+        if self.is_empty(sig):
+            return []
+        return [
+            (band, sig[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
@@ -89,6 +89,7 @@ class RiskAnalysis(BaseModel):
     metrics: RiskMetrics
     flagged: bool = False
     flags: List[str] = Field(default_factory=list)
+    duplicates: List[str] = Field(default_factory=list)  # post_ids of near-duplicates collapsed into this one
 
 
 class TimelineEntry(BaseModel):
@@ -98,6 +99,38 @@ class TimelineEntry(BaseModel):
     content: str
     url: Optional[str] = None
     risk_score: float = Field(ge=0.0, le=100.0)
+    duplicate_of: Optional[str] = None  # post_id of the analyzed near-duplicate, if any
+
+
+class TimelinePage(BaseModel):
+    scan_id: str
+    entries: List[TimelineEntry] = Field(default_factory=list)
+    total: int  # entries matching the filters, across all pages
+    next_cursor: Optional[int] = None  # pass as cursor to get the next page; None on the last page
+
+
+class TimelineHistogram(BaseModel):
+    """Timeline activity per platform per time bucket, as parallel columns"""
+    scan_id: str
+    granularity: str  # "day", "week" or "month"
+    bucket_start: List[int] = Field(default_factory=list)  # epoch seconds, UTC
+    platform: List[str] = Field(default_factory=list)
+    count: List[int] = Field(default_factory=list)
+    mean_risk: List[float] = Field(default_factory=list)
+    max_risk: List[float] = Field(default_factory=list)
+    flagged: List[int] = Field(default_factory=list)
+
+
+class ScanHistoryEntry(BaseModel):
+    scan_id: str
+    scan_timestamp: datetime
+    query: QueryInputs
+    lexicon_version: Optional[str] = None
+    summary: Dict[str, Any] = Field(default_factory=dict)
+
+
+class ScanHistory(BaseModel):
+    scans: List[ScanHistoryEntry] = Field(default_factory=list)  # most recent first
 
 
 class ConfidenceScore(BaseModel):
@@ -107,13 +140,27 @@ class ConfidenceScore(BaseModel):
     factors: Dict[str, float] = Field(default_factory=dict)
 
 
+class IdentityClusterMember(BaseModel):
+    platform: Platform
+    username: Optional[str] = None
+    profile_url: str
+
+
+class IdentityCluster(BaseModel):
+    cluster_id: int
+    members: List[IdentityClusterMember] = Field(default_factory=list)
+    confidence: float = Field(ge=0.0, le=1.0)
+
+
 class ScanResponse(BaseModel):
     accounts_found: int
     footprints: Dict[str, List[FootprintResult]] = Field(default_factory=dict)
     confidence_scores: List[ConfidenceScore] = Field(default_factory=list)
     risk_analysis: List[RiskAnalysis] = Field(default_factory=list)
     timeline: List[TimelineEntry] = Field(default_factory=list)
-    exportable_report: Dict[str, Any] = Field(default_factory=dict)
+    identity_clusters: List[IdentityCluster] = Field(default_factory=list)
+    summary: Optional[Dict[str, Any]] = None  # only with ?include=summary or ?fields=summary
+    exportable_report: Optional[Dict[str, Any]] = None  # only with ?include=report; see /export/{scan_id}
     scan_id: str
     scan_timestamp: datetime
 
@@ -0,0 +1,87 @@
+"""
+Copyright (c) 2024 FootprintScan. All Rights Reserved.
+
+This software and associated documentation files (the "Software") are proprietary
+and confidential. Unauthorized copying, modification, distribution, or use of
+this Software, via any medium, is strictly prohibited without express written
+permission from the copyright holder.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from models import FootprintResult, Platform
+
+
+@dataclass(slots=True)
+class ContentRecord:
+    """A scraped post or comment, as used inside the analysis pipeline"""
+    content: str = ''
+    title: str = ''
+    url: Optional[str] = None
+    timestamp: Any = None  # as scraped, and as returned by the API
+    epoch: Optional[float] = None  # UTC epoch seconds, set by TimestampNormalizer
+    score: Optional[float] = None
+    extra: Optional[Dict[str, Any]] = None
+
+    def __post_init__(self):
+        self.content = self.content or ''
+        self.title = self.title or ''
+
+    @property
+    def text(self) -> str:
+        """The text that is analyzed: the content, or the title when there is none"""
+        return self.content or self.title
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The item as returned by the API"""
+        item = dict(self.extra) if self.extra else {}
+        if self.title:
+            item['title'] = self.title
+        item['content'] = self.content
+        if self.url is not None:
+            item['url'] = self.url
+        if self.timestamp is not None:
+            item['timestamp'] = self.timestamp
+        elif self.epoch is not None:
+            item['timestamp'] = datetime.fromtimestamp(self.epoch, tz=timezone.utc).isoformat()
+        if self.score is not None:
+            item['score'] = self.score
+        return item
+
+
+@dataclass(slots=True)
+class AccountRecord:
+    """A scraped account, as used inside the analysis pipeline; see FootprintResult for the API form"""
+    platform: Platform
+    profile_url: str
+    confidence_score: float
+    username: Optional[str] = None
+    profile_name: Optional[str] = None
+    avatar_url: Optional[str] = None
+    bio: Optional[str] = None
+    posts: List[ContentRecord] = field(default_factory=list)
+    comments: List[ContentRecord] = field(default_factory=list)
+    links: List[str] = field(default_factory=list)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    # MinHash stylometry signature, computed once by IdentityMatcher
+    stylometry_signature: Any = field(default=None, repr=False, compare=False)
+
+    def to_model(self) -> FootprintResult:
+        return FootprintResult.model_construct(
+            platform=self.platform,
+            username=self.username,
+            profile_url=self.profile_url,
+            profile_name=self.profile_name,
+            avatar_url=self.avatar_url,
+            bio=self.bio,
+            posts=[post.to_dict() for post in self.posts],
+            comments=[comment.to_dict() for comment in self.comments],
+            links=self.links,
+            confidence_score=self.confidence_score,
+            metadata=self.metadata
+        )
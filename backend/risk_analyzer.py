@@ -24,13 +24,20 @@ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
 FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
 """
 
+import os
 import re
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+import hashlib
+from typing import List, Dict, Any, Optional, Tuple
 import nltk
 from nltk.sentiment import SentimentIntensityAnalyzer
 from collections import Counter
 import numpy as np
+from records import AccountRecord, ContentRecord
+from lexicon import Lexicon, LexiconStore
+from sentiment_pool import SentimentScorer
+from cache import LRUCache
+from simhash import simhash64, group_near_duplicates
+from risk_model import load_risk_model
 
 try:
     nltk.data.find('vader_lexicon')
@@ -43,119 +50,133 @@ except LookupError:
     nltk.download('punkt', quiet=True)
 
 
+METRIC_COLUMNS = (
+    'toxicity', 'hate_speech', 'nsfw', 'political_intensity',
+    'sentiment', 'volatility', 'overall_risk'
+)
+
+# Categories scored from lexicon keyword matches
+KEYWORD_CATEGORIES = ('toxicity', 'hate_speech', 'nsfw', 'political_intensity')
+
+# Metrics that depend only on the text, and can be cached by content hash
+CONTENT_METRICS = ('toxicity', 'hate_speech', 'nsfw', 'political_intensity', 'sentiment')
+
+# (metric, threshold, flag) - content is flagged when the metric exceeds the threshold
+FLAG_RULES = (
+    ('toxicity', 0.5, 'High Toxicity'),
+    ('hate_speech', 0.3, 'Hate Speech'),
+    ('nsfw', 0.4, 'NSFW Content'),
+    ('political_intensity', 0.6, 'High Political Intensity'),
+    ('overall_risk', 70, 'High Overall Risk')
+)
+
+
 class RiskAnalyzer:
     def __init__(self):
         self.sia = SentimentIntensityAnalyzer()
+        self.sentiment_scorer = SentimentScorer(self.sia)
         
-        # Toxicity keywords
-        self.toxicity_keywords = {
-            'insult', 'stupid', 'idiot', 'moron', 'dumb', 'fool', 'loser',
-            'hate', 'despise', 'loathe', 'disgusting', 'pathetic', 'worthless'
-        }
+        # Keyword lexicons are loaded from a versioned file and hot-reloaded when it changes
+        self.lexicon_store = LexiconStore(
+            os.getenv('RISK_LEXICON_PATH') or None,
+            check_interval=float(os.getenv('RISK_LEXICON_CHECK_INTERVAL', '5'))
+        )
         
-        # Hate speech indicators
-        self.hate_keywords = {
-            'racist', 'racism', 'sexist', 'sexism', 'homophobic', 'bigot',
-            'nazi', 'fascist', 'supremacist', 'discrimination', 'prejudice'
-        }
+        # Optional classifier for toxicity and hate speech; keywords are the fallback
+        self.risk_model = load_risk_model()
+        self.model_version = f"vader+{self.risk_model.name}" if self.risk_model else 'vader'
+        self.model_fallbacks = 0
         
-        # NSFW indicators
-        self.nsfw_keywords = {
-            'nsfw', 'explicit', 'adult', 'xxx', 'porn', 'sexual', 'nude',
-            'naked', 'erotic', 'lewd', 'vulgar', 'obscene'
-        }
+        # Content-only metrics keyed by hash of normalized text and scoring versions
+        self.metric_cache = LRUCache(maxsize=int(os.getenv('RISK_CACHE_SIZE', '50000')))
         
-        # Political intensity keywords
-        self.political_keywords = {
-            'politics', 'political', 'election', 'vote', 'democrat', 'republican',
-            'liberal', 'conservative', 'left', 'right', 'government', 'policy',
-            'congress', 'senate', 'president', 'trump', 'biden', 'republic',
-            'democracy', 'authoritarian', 'fascism', 'socialism', 'capitalism'
+        # Near-duplicate texts within this many SimHash bits are analyzed once (-1 disables)
+        self.dedup_max_distance = int(os.getenv('DEDUP_MAX_DISTANCE', '3'))
+    
+    @property
+    def lexicon_version(self) -> str:
+        return self.lexicon_store.current.version
+    
+    def extract_features(
+        self,
+        contents: List[str],
+        with_sentiment: bool = True,
+        lexicon: Optional[Lexicon] = None
+    ) -> Dict[str, np.ndarray]:
+        """Gather per-item scoring features into column arrays"""
+        lexicon = lexicon or self.lexicon_store.current
+        n = len(contents)
+        features = {
+            'word_count': np.zeros(n),
+            'shouting': np.zeros(n, dtype=bool),
+            'exclamations': np.zeros(n),
+            'questions': np.zeros(n),
+            'sentiment': np.zeros(n)
         }
+        for category in KEYWORD_CATEGORIES:
+            features[category] = np.zeros(n)
+        
+        for i, content in enumerate(contents):
+            if not content:
+                continue
+            features['word_count'][i] = len(content.split())
+            for category, count in lexicon.matcher.scan(content.lower()).items():
+                if category in features:
+                    features[category][i] = count
+            features['shouting'][i] = len(content) > 10 and content.isupper()
+            features['exclamations'][i] = content.count('!')
+            features['questions'][i] = content.count('?')
+        
+        if with_sentiment:
+            features['sentiment'] = self.sentiment_scorer.score(contents)
+        
+        return features
+    
+    def keyword_columns(self, features: Dict[str, np.ndarray], lexicon: Optional[Lexicon] = None) -> Dict[str, np.ndarray]:
+        """Normalize keyword counts by word count and apply the toxicity adjustments"""
+        lexicon = lexicon or self.lexicon_store.current
+        word_count = features['word_count']
+        has_words = word_count > 0
+        safe_word_count = np.maximum(word_count, 1)
+        
+        columns = {}
+        for category in KEYWORD_CATEGORIES:
+            multiplier = lexicon.multipliers.get(category, 0.0)
+            columns[category] = np.where(
+                has_words,
+                np.minimum(1.0, (features[category] / safe_word_count) * multiplier),
+                0.0
+            )
+        
+        # All caps (shouting) and excessive punctuation raise toxicity
+        shouting = features['shouting'] & has_words
+        columns['toxicity'] = np.minimum(1.0, columns['toxicity'] + 0.2 * shouting)
+        punctuation = ((features['exclamations'] > 3) | (features['questions'] > 5)) & has_words
+        columns['toxicity'] = np.minimum(1.0, columns['toxicity'] + 0.1 * punctuation)
+        
+        return columns
+    
+    def keyword_scores(self, content: str) -> Dict[str, float]:
+        """Calculate toxicity, hate speech, NSFW and political scores in one pass"""
+        lexicon = self.lexicon_store.current
+        columns = self.keyword_columns(self.extract_features([content], with_sentiment=False, lexicon=lexicon), lexicon)
+        return {category: float(column[0]) for category, column in columns.items()}
     
     def calculate_toxicity(self, content: str) -> float:
         """Calculate toxicity score"""
-        if not content:
-            return 0.0
-        
-        content_lower = content.lower()
-        word_count = len(content.split())
-        
-        if word_count == 0:
-            return 0.0
-        
-        # Count toxicity keywords
-        toxicity_count = sum(1 for keyword in self.toxicity_keywords if keyword in content_lower)
-        
-        # Normalize by word count
-        toxicity_score = min(1.0, (toxicity_count / max(word_count, 1)) * 10)
-        
-        # Check for all caps (shouting)
-        if len(content) > 10 and content.isupper():
-            toxicity_score = min(1.0, toxicity_score + 0.2)
-        
-        # Check for excessive punctuation
-        if content.count('!') > 3 or content.count('?') > 5:
-            toxicity_score = min(1.0, toxicity_score + 0.1)
-        
-        return float(toxicity_score)
+        return self.keyword_scores(content)['toxicity']
     
     def calculate_hate_speech(self, content: str) -> float:
         """Calculate hate speech probability"""
-        if not content:
-            return 0.0
-        
-        content_lower = content.lower()
-        word_count = len(content.split())
-        
-        if word_count == 0:
-            return 0.0
-        
-        # Count hate speech keywords
-        hate_count = sum(1 for keyword in self.hate_keywords if keyword in content_lower)
-        
-        # Normalize by word count
-        hate_score = min(1.0, (hate_count / max(word_count, 1)) * 15)
-        
-        return float(hate_score)
+        return self.keyword_scores(content)['hate_speech']
     
     def calculate_nsfw(self, content: str) -> float:
         """Calculate NSFW likelihood"""
-        if not content:
-            return 0.0
-        
-        content_lower = content.lower()
-        word_count = len(content.split())
-        
-        if word_count == 0:
-            return 0.0
-        
-        # Count NSFW keywords
-        nsfw_count = sum(1 for keyword in self.nsfw_keywords if keyword in content_lower)
-        
-        # Normalize by word count
-        nsfw_score = min(1.0, (nsfw_count / max(word_count, 1)) * 20)
-        
-        return float(nsfw_score)
+        return self.keyword_scores(content)['nsfw']
     
     def calculate_political_intensity(self, content: str) -> float:
         """Calculate political intensity"""
-        if not content:
-            return 0.0
-        
-        content_lower = content.lower()
-        word_count = len(content.split())
-        
-        if word_count == 0:
-            return 0.0
-        
-        # Count political keywords
-        political_count = sum(1 for keyword in self.political_keywords if keyword in content_lower)
-        
-        # Normalize by word count
-        political_score = min(1.0, (political_count / max(word_count, 1)) * 5)
-        
-        return float(political_score)
+        return self.keyword_scores(content)['political_intensity']
     
     def calculate_sentiment(self, content: str) -> float:
         """Calculate sentiment score (-1 to 1)"""
@@ -166,36 +187,22 @@ class RiskAnalyzer:
         # Return compound score normalized to -1 to 1
         return float(scores['compound'])
     
-    def calculate_volatility(self, posts: List[Dict[str, Any]]) -> float:
+    def calculate_volatility(self, posts: List[ContentRecord]) -> float:
         """Calculate posting volatility based on frequency and content variation"""
         if not posts or len(posts) < 2:
             return 0.0
         
-        # Extract timestamps
-        timestamps = []
-        for post in posts:
-            if 'timestamp' in post:
-                try:
-                    if isinstance(post['timestamp'], str):
-                        ts = datetime.fromisoformat(post['timestamp'].replace('Z', '+00:00'))
-                    else:
-                        ts = post['timestamp']
-                    timestamps.append(ts)
-                except Exception:
-                    pass
+        # Timestamps are epoch seconds, normalized at ingest
+        timestamps = np.array([post.epoch for post in posts if post.epoch is not None], dtype=float)
         
         if len(timestamps) < 2:
             return 0.5  # Default moderate volatility
         
-        # Calculate time intervals
-        timestamps.sort()
-        intervals = []
-        for i in range(1, len(timestamps)):
-            delta = (timestamps[i] - timestamps[i-1]).total_seconds() / 3600  # hours
-            if delta > 0:
-                intervals.append(delta)
+        # Calculate time intervals in hours
+        intervals = np.diff(np.sort(timestamps)) / 3600
+        intervals = intervals[intervals > 0]
         
-        if not intervals:
+        if len(intervals) == 0:
             return 0.5
         
         # High volatility = irregular posting patterns
@@ -210,47 +217,183 @@ class RiskAnalyzer:
         
         return float(volatility)
     
-    def analyze_risk(self, content: str, posts: List[Dict[str, Any]]) -> Dict[str, float]:
+    def analyze_risk(self, content: str, posts: List[ContentRecord]) -> Dict[str, float]:
         """Analyze risk for a single post/comment"""
-        toxicity = self.calculate_toxicity(content)
-        hate = self.calculate_hate_speech(content)
-        nsfw = self.calculate_nsfw(content)
-        politics = self.calculate_political_intensity(content)
-        sentiment = self.calculate_sentiment(content)
-        volatility = self.calculate_volatility(posts)
+        columns = self.score_columns([content], np.array([self.calculate_volatility(posts)]))
+        return self.metric_rows(columns)[0]
+    
+    def content_key(self, normalized: str, lexicon_version: str) -> str:
+        """Cache key for a normalized text under a lexicon version and the current model"""
+        digest = hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).hexdigest()
+        return f"{lexicon_version}:{self.model_version}:{digest}"
+    
+    def content_columns(self, contents: List[str]) -> Dict[str, np.ndarray]:
+        """Content-only metric columns, reusing cached scores for texts seen before"""
+        # Whitespace is collapsed before hashing and scoring so trivially different copies share an entry
+        normalized = [' '.join(content.split()) if content else '' for content in contents]
+        # One lexicon snapshot per batch, even if a reload happens meanwhile
+        lexicon = self.lexicon_store.current
+        keys = [self.content_key(text, lexicon.version) for text in normalized]
+        matrix = np.zeros((len(contents), len(CONTENT_METRICS)))
+        
+        missing: Dict[str, List[int]] = {}
+        for i, key in enumerate(keys):
+            cached = self.metric_cache.get(key)
+            if cached is None:
+                missing.setdefault(key, []).append(i)
+            else:
+                matrix[i] = cached
+        
+        if missing:
+            # Each distinct uncached text is scored once, however often it repeats
+            rows = [positions[0] for positions in missing.values()]
+            features = self.extract_features([normalized[i] for i in rows], lexicon=lexicon)
+            columns = self.keyword_columns(features, lexicon)
+            columns['sentiment'] = features['sentiment']
+            model_scored = self._apply_risk_model(columns, [normalized[i] for i in rows])
+            scored = np.column_stack([columns[name] for name in CONTENT_METRICS])
+            for (key, positions), values in zip(missing.items(), scored):
+                matrix[positions] = values
+                # Keyword fallback results must not be cached under the model's key
+                if model_scored:
+                    self.metric_cache.set(key, tuple(values.tolist()))
+        
+        return {name: matrix[:, col] for col, name in enumerate(CONTENT_METRICS)}
+    
+    def _apply_risk_model(self, columns: Dict[str, np.ndarray], texts: List[str]) -> bool:
+        """Replace keyword toxicity and hate speech with classifier scores when a model is configured.
+        
+        Returns False if the model was configured but could not be used, in
+        which case the keyword scores are left in place.
+        """
+        if self.risk_model is None:
+            return True
+        try:
+            predictions = self.risk_model.predict(texts)
+        except Exception:
+            self.model_fallbacks += 1
+            return False
+        columns['toxicity'] = np.clip(predictions[:, 0], 0.0, 1.0)
+        columns['hate_speech'] = np.clip(predictions[:, 1], 0.0, 1.0)
+        return True
+    
+    def model_stats(self) -> Optional[Dict[str, Any]]:
+        """Latency and batching metrics of the classifier backend, if configured"""
+        if self.risk_model is None:
+            return None
+        return dict(self.risk_model.stats(), fallbacks=self.model_fallbacks)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of the content metric cache"""
+        return self.metric_cache.stats()
+    
+    def score_columns(self, contents: List[str], volatility: np.ndarray) -> Dict[str, np.ndarray]:
+        """Score many items at once; volatility holds each item's account volatility"""
+        columns = self.content_columns(contents)
+        columns['volatility'] = np.asarray(volatility, dtype=float)
         
         # Calculate overall risk score
-        overall_risk = (0.40 * toxicity + 0.20 * hate + 0.15 * nsfw + 
-                       0.15 * politics + 0.10 * volatility) * 100
-        
-        return {
-            'toxicity': toxicity,
-            'hate_speech': hate,
-            'nsfw': nsfw,
-            'political_intensity': politics,
-            'sentiment': sentiment,
-            'volatility': volatility,
-            'overall_risk': overall_risk
-        }
+        columns['overall_risk'] = (0.40 * columns['toxicity'] + 0.20 * columns['hate_speech'] +
+                                   0.15 * columns['nsfw'] + 0.15 * columns['political_intensity'] +
+                                   0.10 * columns['volatility']) * 100
+        return columns
+    
+    def metric_rows(self, columns: Dict[str, np.ndarray]) -> List[Dict[str, float]]:
+        """Materialize metric columns into one dict per item"""
+        matrix = np.column_stack([columns[name] for name in METRIC_COLUMNS]).tolist()
+        return [dict(zip(METRIC_COLUMNS, row)) for row in matrix]
+    
+    def account_items(self, result: AccountRecord) -> List[Tuple[str, ContentRecord, str]]:
+        """List (type, item, content) for every post and comment with text"""
+        items = []
+        for post in result.posts:
+            if post.text:
+                items.append(('post', post, post.text))
+        for comment in result.comments:
+            if comment.content:
+                items.append(('comment', comment, comment.content))
+        return items
+    
+    def analyze_account(self, result: AccountRecord) -> List[Dict[str, float]]:
+        """Analyze every post and comment of an account, aligned with account_items()"""
+        _, columns = self.analyze_accounts([result])
+        return self.metric_rows(columns)
+    
+    def _collect_items(
+        self,
+        results: List[AccountRecord]
+    ) -> Tuple[List[Tuple[AccountRecord, ContentRecord, str]], np.ndarray]:
+        """Gather (result, item, content) for all accounts with each item's account volatility"""
+        items = []
+        volatility = []
+        for result in results:
+            account_volatility = {
+                'post': self.calculate_volatility(result.posts),
+                'comment': self.calculate_volatility(result.comments)
+            }
+            for item_type, item, content in self.account_items(result):
+                items.append((result, item, content))
+                volatility.append(account_volatility[item_type])
+        return items, np.array(volatility, dtype=float)
+    
+    def analyze_accounts(
+        self,
+        results: List[AccountRecord]
+    ) -> Tuple[List[Tuple[AccountRecord, ContentRecord, str]], Dict[str, np.ndarray]]:
+        """Score every post and comment of all accounts in one columnar pass.
+        
+        Returns (result, item, content) for each scored item together with
+        metric columns aligned to that list. Volatility depends only on the
+        account, so it is computed once for posts and once for comments.
+        """
+        items, volatility = self._collect_items(results)
+        columns = self.score_columns([content for _, _, content in items], volatility)
+        return items, columns
+    
+    def analyze_scan(
+        self,
+        results: List[AccountRecord]
+    ) -> Tuple[List[Tuple[AccountRecord, ContentRecord, str]], Dict[str, np.ndarray], List[List[ContentRecord]]]:
+        """Like analyze_accounts, but near-duplicate items are collapsed first.
+        
+        Only one representative per group of near-identical texts is scored.
+        The third return value lists, for each representative, the duplicate
+        items it stands for.
+        """
+        items, volatility = self._collect_items(results)
+        fingerprints = [simhash64(content) for _, _, content in items]
+        representative = group_near_duplicates(fingerprints, self.dedup_max_distance)
+        
+        kept: List[int] = []
+        position: Dict[int, int] = {}
+        duplicates: List[List[ContentRecord]] = []
+        for i, rep in enumerate(representative):
+            if rep == i:
+                position[i] = len(kept)
+                kept.append(i)
+                duplicates.append([])
+            else:
+                duplicates[position[rep]].append(items[i][1])
+        
+        columns = self.score_columns(
+            [items[i][2] for i in kept],
+            volatility[kept]
+        )
+        return [items[i] for i in kept], columns, duplicates
     
     def should_flag(self, risk_metrics: Dict[str, float]) -> tuple[bool, List[str]]:
         """Determine if content should be flagged and why"""
-        flags = []
-        
-        if risk_metrics['toxicity'] > 0.5:
-            flags.append('High Toxicity')
-        
-        if risk_metrics['hate_speech'] > 0.3:
-            flags.append('Hate Speech')
-        
-        if risk_metrics['nsfw'] > 0.4:
-            flags.append('NSFW Content')
-        
-        if risk_metrics['political_intensity'] > 0.6:
-            flags.append('High Political Intensity')
-        
-        if risk_metrics['overall_risk'] > 70:
-            flags.append('High Overall Risk')
-        
+        flags = [flag for metric, threshold, flag in FLAG_RULES if risk_metrics[metric] > threshold]
         return len(flags) > 0, flags
-
+    
+    def flag_columns(self, columns: Dict[str, np.ndarray]) -> Tuple[np.ndarray, List[List[str]]]:
+        """Vectorized should_flag over metric columns"""
+        size = len(columns['overall_risk'])
+        flags: List[List[str]] = [[] for _ in range(size)]
+        flagged = np.zeros(size, dtype=bool)
+        for metric, threshold, flag in FLAG_RULES:
+            mask = columns[metric] > threshold
+            flagged |= mask
+            for i in np.flatnonzero(mask):
+                flags[i].append(flag)
+        return flagged, flags
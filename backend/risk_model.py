@@ -0,0 +1,221 @@
+"""
+Copyright (c) 2024 FootprintScan. All Rights Reserved.
+
+This software and associated documentation files (the "Software") are proprietary
+and confidential. Unauthorized copying, modification, distribution, or use of
+this Software, via any medium, is strictly prohibited without express written
+permission from the copyright holder.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+"""
+
+import os
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+
+class RiskModelOverloaded(Exception):
+    """Raised when the model queue is full; callers fall back to keyword scoring"""
+
+
+class RiskModel(ABC):
+    """Classifier backend producing toxicity and hate speech scores"""
+
+    name = 'model'
+
+    @abstractmethod
+    def predict(self, texts: List[str]) -> np.ndarray:
+        """
+        Score texts.
+
+        Returns:
+            Array of shape (len(texts), 2) with toxicity and hate speech in [0, 1]
+        """
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {'name': self.name}
+
+    def close(self):
+        pass
+
+
+class OnnxRiskModel(RiskModel):
+    """Distilled transformer classifier exported to ONNX and run on CPU"""
+
+    def __init__(self, model_path: str, tokenizer_path: str):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = int(os.getenv('RISK_MODEL_THREADS', '1'))
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        max_length = int(os.getenv('RISK_MODEL_MAX_LENGTH', '256'))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        self.toxicity_index = int(os.getenv('RISK_MODEL_TOXICITY_INDEX', '0'))
+        self.hate_index = int(os.getenv('RISK_MODEL_HATE_INDEX', '1'))
+        self.name = f"onnx:{os.path.basename(model_path)}"
+
+    def predict(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        inputs = {
+            'input_ids': np.array([e.ids for e in encodings], dtype=np.int64),
+            'attention_mask': np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        }
+        if 'token_type_ids' in self.input_names:
+            inputs['token_type_ids'] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        logits = self.session.run(None, {k: v for k, v in inputs.items() if k in self.input_names})[0]
+        # Multi-label head: independent sigmoid per label
+        probabilities = 1.0 / (1.0 + np.exp(-logits))
+        return probabilities[:, [self.toxicity_index, self.hate_index]]
+
+
+class BatchingRiskModel(RiskModel):
+    """Groups predict calls from concurrent scans into batches for the wrapped model.
+
+    A single worker thread collects requests until max_batch_size texts are
+    queued or max_wait has passed since the first one arrived. Once more than
+    max_queue texts are waiting, predict raises RiskModelOverloaded instead of
+    queueing. Calls with more than max_queue texts are queued max_queue texts
+    at a time, each part subject to the same limit.
+    """
+
+    def __init__(self, model: RiskModel, max_batch_size: int = 32, max_wait: float = 0.01,
+                 max_queue: int = 256, timeout: float = 5.0):
+        self.model = model
+        self.name = model.name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.timeout = timeout
+
+        self._queue: 'queue.Queue[Optional[tuple]]' = queue.Queue()
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._latencies: deque = deque(maxlen=1000)
+        self._batch_sizes: deque = deque(maxlen=1000)
+        self.requests = 0
+        self.batches = 0
+        self.overloaded = 0
+
+        self._worker = threading.Thread(target=self._run, name='risk-model-batcher', daemon=True)
+        self._worker.start()
+
+    def predict(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 2))
+
+        with self._pending_lock:
+            self.requests += 1
+        return np.concatenate([self._predict_queued(texts[start:start + self.max_queue])
+                               for start in range(0, len(texts), self.max_queue)])
+
+    def _predict_queued(self, texts: List[str]) -> np.ndarray:
+        """Queue at most max_queue texts for the worker and wait for their scores"""
+        with self._pending_lock:
+            if self._pending + len(texts) > self.max_queue:
+                self.overloaded += 1
+                raise RiskModelOverloaded()
+            self._pending += len(texts)
+
+        # Requests larger than a batch are split so they interleave with other scans
+        futures = []
+        for start in range(0, len(texts), self.max_batch_size):
+            future: Future = Future()
+            self._queue.put((texts[start:start + self.max_batch_size], future))
+            futures.append(future)
+        return np.concatenate([future.result(timeout=self.timeout) for future in futures])
+
+    def _run(self):
+        while True:
+            request = self._queue.get()
+            if request is None:
+                return
+
+            batch = [request]
+            size = len(request[0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is None:
+                    self._queue.put(None)
+                    break
+                batch.append(request)
+                size += len(request[0])
+
+            texts = [text for request_texts, _ in batch for text in request_texts]
+            started = time.perf_counter()
+            try:
+                predictions = self.model.predict(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                offset = 0
+                for request_texts, future in batch:
+                    future.set_result(predictions[offset:offset + len(request_texts)])
+                    offset += len(request_texts)
+            finally:
+                self._latencies.append(time.perf_counter() - started)
+                self._batch_sizes.append(len(texts))
+                self.batches += 1
+                with self._pending_lock:
+                    self._pending -= len(texts)
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = np.array(self._latencies) * 1000 if self._latencies else np.zeros(1)
+        return {
+            'name': self.name,
+            'requests': self.requests,
+            'batches': self.batches,
+            'overloaded': self.overloaded,
+            'pending': self._pending,
+            'mean_batch_size': float(np.mean(self._batch_sizes)) if self._batch_sizes else 0.0,
+            'latency_ms_p50': float(np.percentile(latencies, 50)),
+            'latency_ms_p95': float(np.percentile(latencies, 95))
+        }
+
+    def close(self):
+        self._queue.put(None)
+        self.model.close()
+
+
+def load_risk_model() -> Optional[RiskModel]:
+    """Build the classifier configured by RISK_MODEL_PATH, or None to use keywords only"""
+    model_path = os.getenv('RISK_MODEL_PATH', '')
+    if not model_path:
+        return None
+
+    try:
+        model = OnnxRiskModel(model_path, os.getenv('RISK_MODEL_TOKENIZER', ''))
+    except Exception as e:
+        print(f"Failed to load risk model {model_path}: {e}")
+        return None
+
+    return BatchingRiskModel(
+        model,
+        max_batch_size=int(os.getenv('RISK_MODEL_MAX_BATCH', '32')),
+        max_wait=float(os.getenv('RISK_MODEL_MAX_WAIT_MS', '10')) / 1000,
+        max_queue=int(os.getenv('RISK_MODEL_MAX_QUEUE', '256')),
+        timeout=float(os.getenv('RISK_MODEL_TIMEOUT', '5'))
+    )
@@ -0,0 +1,335 @@
+"""
+Copyright (c) 2024 FootprintScan. All Rights Reserved.
+
+This software and associated documentation files (the "Software") are proprietary
+and confidential. Unauthorized copying, modification, distribution, or use of
+this Software, via any medium, is strictly prohibited without express written
+permission from the copyright holder.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+"""
+
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+import orjson
+from models import (
+    ConfidenceScore, FootprintResult, IdentityCluster, Platform, QueryInputs,
+    RiskAnalysis, RiskMetrics, ScanResponse
+)
+from scan_store import StoredScan
+from serialization import ORJSON_OPTIONS
+from timeline_builder import Timeline
+
+METRICS = ('toxicity', 'hate_speech', 'nsfw', 'political_intensity', 'sentiment', 'volatility', 'overall_risk')
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS scans (
+    scan_id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    scan_timestamp TEXT NOT NULL,
+    query TEXT NOT NULL,
+    lexicon_version TEXT,
+    accounts_found INTEGER NOT NULL,
+    summary TEXT NOT NULL,
+    identity_clusters TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scans_created_at ON scans (created_at);
+
+CREATE TABLE IF NOT EXISTS scan_subjects (
+    scan_id TEXT NOT NULL REFERENCES scans (scan_id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (scan_id, kind, value)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS scan_subjects_value ON scan_subjects (kind, value);
+
+CREATE TABLE IF NOT EXISTS accounts (
+    scan_id TEXT NOT NULL REFERENCES scans (scan_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    platform TEXT NOT NULL,
+    username TEXT,
+    profile_name TEXT,
+    profile_url TEXT NOT NULL,
+    avatar_url TEXT,
+    bio TEXT,
+    confidence_score REAL NOT NULL,
+    confidence_factors TEXT NOT NULL,
+    posts TEXT NOT NULL,
+    comments TEXT NOT NULL,
+    links TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    PRIMARY KEY (scan_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS accounts_platform_username ON accounts (platform, username);
+
+CREATE TABLE IF NOT EXISTS risk_items (
+    scan_id TEXT NOT NULL REFERENCES scans (scan_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    post_id TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    url TEXT,
+    timestamp INTEGER,
+    content TEXT NOT NULL,
+    {', '.join(f'{metric} REAL NOT NULL' for metric in METRICS)},
+    flagged INTEGER NOT NULL,
+    flags TEXT NOT NULL,
+    duplicates TEXT NOT NULL,
+    PRIMARY KEY (scan_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS risk_items_platform_timestamp ON risk_items (platform, timestamp);
+
+CREATE TABLE IF NOT EXISTS timeline_events (
+    scan_id TEXT NOT NULL REFERENCES scans (scan_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    platform TEXT NOT NULL,
+    type TEXT NOT NULL,
+    content TEXT NOT NULL,
+    url TEXT,
+    risk_score REAL NOT NULL,
+    flagged INTEGER NOT NULL,
+    duplicate_of TEXT,
+    PRIMARY KEY (scan_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS timeline_events_platform_timestamp ON timeline_events (platform, timestamp);
+"""
+
+
+def _json(value: Any) -> str:
+    return orjson.dumps(value, option=ORJSON_OPTIONS).decode()
+
+
+def subject_keys(query_inputs: QueryInputs) -> List[tuple]:
+    """(kind, value) pairs a scan is looked up by; values are normalized as for matching"""
+    keys = []
+    if query_inputs.name:
+        keys.append(('name', ' '.join(query_inputs.name.lower().split())))
+    for username in query_inputs.usernames:
+        username = username.strip().lstrip('@').lower()
+        if username:
+            keys.append(('username', username))
+    if query_inputs.email:
+        keys.append(('email', query_inputs.email.strip().lower()))
+    return list(dict.fromkeys(keys))
+
+
+class ScanDatabase:
+    """
+    SQLite store for finished scans, in normalized tables.
+    
+    A scan is written in one transaction, each table with a single batched
+    executemany. Scans are found by scan_id, or by subject (the name,
+    usernames and email that were searched for) and platform. Scans older
+    than retention_days are deleted, children included, at most once per
+    purge_interval seconds; retention_days <= 0 keeps them forever.
+    """
+    
+    def __init__(self, path: str, retention_days: float = 30, purge_interval: float = 3600):
+        self.path = path
+        self.retention_days = retention_days
+        self.purge_interval = purge_interval
+        # One connection shared by the analysis threads, serialized by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode = WAL')
+        self._conn.execute('PRAGMA synchronous = NORMAL')
+        self._conn.execute('PRAGMA foreign_keys = ON')
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._purged_at = 0.0
+        self.purge()
+    
+    def save(self, scan: StoredScan):
+        response = scan.response
+        accepted_results = [r for results in response.footprints.values() for r in results]
+        confidence_factors = [cs.factors for cs in response.confidence_scores]
+        
+        # Rows are built before taking the lock so only the inserts are serialized
+        scan_row = (
+            scan.scan_id,
+            scan.created_at.timestamp(),
+            response.scan_timestamp.isoformat(),
+            _json(scan.query_inputs.model_dump(mode='json')),
+            scan.lexicon_version,
+            response.accounts_found,
+            _json(scan.summary()),
+            _json([cluster.model_dump(mode='json') for cluster in response.identity_clusters])
+        )
+        subject_rows = [(scan.scan_id, kind, value) for kind, value in subject_keys(scan.query_inputs)]
+        account_rows = [
+            (
+                scan.scan_id, position, result.platform.value, result.username, result.profile_name,
+                result.profile_url, result.avatar_url, result.bio, result.confidence_score,
+                _json(confidence_factors[position] if position < len(confidence_factors) else {}),
+                _json(result.posts), _json(result.comments), _json(result.links), _json(result.metadata)
+            )
+            for position, result in enumerate(accepted_results)
+        ]
+        risk_rows = [
+            (
+                scan.scan_id, position, ra.post_id, ra.platform.value, ra.url,
+                int(ra.timestamp.timestamp()) if ra.timestamp is not None else None, ra.content,
+                *(getattr(ra.metrics, metric) for metric in METRICS),
+                int(ra.flagged), _json(ra.flags), _json(ra.duplicates)
+            )
+            for position, ra in enumerate(response.risk_analysis)
+        ]
+        timeline_rows = [(scan.scan_id, position, *row) for position, row in enumerate(scan.timeline.rows())]
+        
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM scans WHERE scan_id = ?', (scan.scan_id,))
+            self._conn.execute('INSERT INTO scans VALUES (?, ?, ?, ?, ?, ?, ?, ?)', scan_row)
+            self._conn.executemany('INSERT INTO scan_subjects VALUES (?, ?, ?)', subject_rows)
+            self._conn.executemany(f"INSERT INTO accounts VALUES ({', '.join('?' * 14)})", account_rows)
+            self._conn.executemany(f"INSERT INTO risk_items VALUES ({', '.join('?' * (10 + len(METRICS)))})", risk_rows)
+            self._conn.executemany('INSERT INTO timeline_events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', timeline_rows)
+        
+        if time.time() - self._purged_at >= self.purge_interval:
+            self.purge()
+    
+    def load(self, scan_id: str) -> Optional[StoredScan]:
+        """Rebuild a stored scan, or None if it is unknown or past the retention period"""
+        with self._lock:
+            scan_row = self._conn.execute(
+                'SELECT created_at, scan_timestamp, query, lexicon_version, accounts_found, identity_clusters '
+                'FROM scans WHERE scan_id = ? AND created_at >= ?', (scan_id, self.cutoff())
+            ).fetchone()
+            if scan_row is None:
+                return None
+            account_rows = self._conn.execute(
+                'SELECT platform, username, profile_name, profile_url, avatar_url, bio, confidence_score, '
+                'confidence_factors, posts, comments, links, metadata '
+                'FROM accounts WHERE scan_id = ? ORDER BY position', (scan_id,)
+            ).fetchall()
+            risk_rows = self._conn.execute(
+                f"SELECT post_id, platform, url, timestamp, content, {', '.join(METRICS)}, flagged, flags, duplicates "
+                'FROM risk_items WHERE scan_id = ? ORDER BY position', (scan_id,)
+            ).fetchall()
+            timeline_rows = self._conn.execute(
+                'SELECT timestamp, platform, type, content, url, risk_score, flagged, duplicate_of '
+                'FROM timeline_events WHERE scan_id = ? ORDER BY position', (scan_id,)
+            ).fetchall()
+        
+        created_at, scan_timestamp, query, lexicon_version, accounts_found, identity_clusters = scan_row
+        
+        # Everything was validated before it was saved, so the models are constructed directly
+        footprints: Dict[str, List[FootprintResult]] = {}
+        confidence_scores: List[ConfidenceScore] = []
+        for (platform, username, profile_name, profile_url, avatar_url, bio, confidence_score,
+             confidence_factors, posts, comments, links, metadata) in account_rows:
+            platform = Platform(platform)
+            footprints.setdefault(platform.value, []).append(FootprintResult.model_construct(
+                platform=platform,
+                username=username,
+                profile_url=profile_url,
+                profile_name=profile_name,
+                avatar_url=avatar_url,
+                bio=bio,
+                posts=orjson.loads(posts),
+                comments=orjson.loads(comments),
+                links=orjson.loads(links),
+                confidence_score=confidence_score,
+                metadata=orjson.loads(metadata)
+            ))
+            confidence_scores.append(ConfidenceScore.model_construct(
+                platform=platform,
+                username=username,
+                score=confidence_score,
+                factors=orjson.loads(confidence_factors)
+            ))
+        
+        risk_analyses: List[RiskAnalysis] = []
+        for row in risk_rows:
+            post_id, platform, url, timestamp, content = row[:5]
+            flagged, flags, duplicates = row[5 + len(METRICS):]
+            risk_analyses.append(RiskAnalysis.model_construct(
+                post_id=post_id,
+                platform=Platform(platform),
+                content=content,
+                timestamp=datetime.fromtimestamp(timestamp, tz=timezone.utc) if timestamp is not None else None,
+                url=url,
+                metrics=RiskMetrics.model_construct(**dict(zip(METRICS, row[5:5 + len(METRICS)]))),
+                flagged=bool(flagged),
+                flags=orjson.loads(flags),
+                duplicates=orjson.loads(duplicates)
+            ))
+        
+        response = ScanResponse.model_construct(
+            accounts_found=accounts_found,
+            footprints=footprints,
+            confidence_scores=confidence_scores,
+            risk_analysis=risk_analyses,
+            identity_clusters=[IdentityCluster.model_validate(c) for c in orjson.loads(identity_clusters)],
+            scan_id=scan_id,
+            scan_timestamp=datetime.fromisoformat(scan_timestamp)
+        )
+        return StoredScan(
+            response,
+            Timeline.from_rows(timeline_rows),
+            QueryInputs.model_validate(orjson.loads(query)),
+            lexicon_version,
+            created_at=datetime.fromtimestamp(created_at)
+        )
+    
+    def find(
+        self,
+        name: Optional[str] = None,
+        username: Optional[str] = None,
+        email: Optional[str] = None,
+        platform: Optional[Platform] = None,
+        limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """Most recent first, the scans that searched for all the given subjects and found an account on platform"""
+        subjects = subject_keys(QueryInputs(name=name, usernames=[username] if username else [], email=email))
+        # Scans past retention are left out even before the next purge deletes them
+        conditions = ['created_at >= ?']
+        params: List[Any] = [self.cutoff()]
+        for kind, value in subjects:
+            conditions.append('scan_id IN (SELECT scan_id FROM scan_subjects WHERE kind = ? AND value = ?)')
+            params += [kind, value]
+        if platform is not None:
+            conditions.append('EXISTS (SELECT 1 FROM accounts a WHERE a.scan_id = scans.scan_id AND a.platform = ?)')
+            params.append(platform.value)
+        
+        where = f"WHERE {' AND '.join(conditions)}"
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT scan_id, scan_timestamp, query, lexicon_version, summary FROM scans {where} "
+                'ORDER BY created_at DESC LIMIT ?', (*params, limit)
+            ).fetchall()
+        return [
+            {
+                'scan_id': scan_id,
+                'scan_timestamp': scan_timestamp,
+                'query': orjson.loads(query),
+                'lexicon_version': lexicon_version,
+                'summary': orjson.loads(summary)
+            }
+            for scan_id, scan_timestamp, query, lexicon_version, summary in rows
+        ]
+    
+    def cutoff(self) -> float:
+        """Creation time, in epoch seconds, before which scans are past the retention period"""
+        if self.retention_days <= 0:
+            return 0.0
+        return time.time() - self.retention_days * 86400
+    
+    def purge(self) -> int:
+        """Delete scans past the retention period; returns how many were deleted"""
+        self._purged_at = time.time()
+        if self.retention_days <= 0:
+            return 0
+        with self._lock, self._conn:
+            return self._conn.execute('DELETE FROM scans WHERE created_at < ?', (self.cutoff(),)).rowcount
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM scans').fetchone()[0]
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,157 @@
+"""
+Copyright (c) 2024 FootprintScan. All Rights Reserved.
+
+This software and associated documentation files (the "Software") are proprietary
+and confidential. Unauthorized copying, modification, distribution, or use of
+this Software, via any medium, is strictly prohibited without express written
+permission from the copyright holder.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+"""
+
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional, Union
+from pydantic import BaseModel
+from models import QueryInputs, ScanResponse
+from timeline_builder import Timeline
+from cache import LRUCache
+
+if TYPE_CHECKING:
+    from scan_database import ScanDatabase
+
+# Sections of the exportable report: single values first, then the per-item lists
+REPORT_HEADER_SECTIONS = ('scan_id', 'scan_timestamp', 'query', 'lexicon_version', 'summary')
+REPORT_LIST_SECTIONS = ('footprints', 'confidence_scores', 'risk_analysis', 'timeline', 'identity_clusters')
+REPORT_SECTIONS = REPORT_HEADER_SECTIONS + REPORT_LIST_SECTIONS
+
+
+class StoredScan:
+    """A finished scan kept for follow-up queries"""
+
+    def __init__(
+        self,
+        response: ScanResponse,
+        timeline: Timeline,
+        query_inputs: QueryInputs,
+        lexicon_version: str,
+        created_at: Optional[datetime] = None
+    ):
+        self.scan_id = response.scan_id
+        self.response = response  # timeline entries are not kept here; see timeline
+        self.timeline = timeline
+        self.query_inputs = query_inputs
+        self.lexicon_version = lexicon_version
+        self.created_at = created_at or datetime.now()
+
+    def summary(self) -> Dict[str, Any]:
+        """Counts over the scan, JSON-ready"""
+        response = self.response
+        accepted_results = [r for results in response.footprints.values() for r in results]
+        return {
+            'total_scraped': response.accounts_found,
+            'total_accounts': len(accepted_results),
+            'total_posts': sum(len(r.posts) for r in accepted_results),
+            'total_comments': sum(len(r.comments) for r in accepted_results),
+            'total_flagged': sum(1 for ra in response.risk_analysis if ra.flagged),
+            'platforms_found': list(response.footprints.keys())
+        }
+
+    def report(self, include: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """The exportable report, built on request as JSON-ready data.
+
+        include is a projection from serialization.field_projection over
+        REPORT_SECTIONS; sections left out of it are not built.
+        """
+        include = include or dict.fromkeys(REPORT_SECTIONS, True)
+        return {name: self._report_section(name, include[name]) for name in REPORT_SECTIONS if name in include}
+
+    def _report_section(self, name: str, include: Union[bool, Dict[str, Any]]) -> Any:
+        if name in REPORT_HEADER_SECTIONS:
+            return self.header_value(name)
+        # Lists project per item through '__all__'
+        item_include = None if include is True else include['__all__']
+        if name == 'footprints':
+            account_include = None if item_include is None else item_include['__all__']
+            return {
+                k: [r.model_dump(mode='json', include=account_include) for r in v]
+                for k, v in self.response.footprints.items()
+            }
+        return [item.model_dump(mode='json', include=item_include) for item in self.iter_section(name)]
+
+    def header_value(self, name: str) -> Any:
+        """A single-valued report section, JSON-ready"""
+        if name == 'scan_id':
+            return self.scan_id
+        if name == 'scan_timestamp':
+            return self.response.scan_timestamp.isoformat()
+        if name == 'query':
+            return self.query_inputs.model_dump(mode='json')
+        if name == 'lexicon_version':
+            return self.lexicon_version
+        return self.summary()
+
+    def iter_section(self, name: str) -> Iterator[BaseModel]:
+        """The items of a list section one at a time; footprints are flattened across platforms"""
+        if name == 'footprints':
+            for results in self.response.footprints.values():
+                yield from results
+        elif name == 'timeline':
+            for i in range(len(self.timeline)):
+                yield self.timeline.entry(i)
+        else:
+            yield from getattr(self.response, name)
+
+
+class ScanStore:
+    """
+    Scans by scan_id, kept in memory and, with a database, on disk.
+    
+    The least recently used scans are dropped from memory beyond maxsize;
+    with a database they are loaded back from it when asked for again.
+    Scans past the database's retention period are not served, from memory
+    either.
+    """
+
+    def __init__(self, maxsize: int = 100, database: Optional['ScanDatabase'] = None):
+        self._scans = LRUCache(maxsize=maxsize)
+        self.database = database
+
+    def put(self, scan: StoredScan):
+        self._scans.set(scan.scan_id, scan)
+        if self.database is not None:
+            try:
+                self.database.save(scan)
+            except Exception as e:
+                # The scan is still served from memory
+                print(f"Failed to save scan {scan.scan_id}: {e}")
+
+    def get(self, scan_id: str) -> Optional[StoredScan]:
+        scan = self.get_cached(scan_id)
+        if scan is None and self.database is not None:
+            scan = self.database.load(scan_id)
+            if scan is not None:
+                self._scans.set(scan_id, scan)
+        return scan
+
+    def get_cached(self, scan_id: str) -> Optional[StoredScan]:
+        """Memory only; never touches the database"""
+        scan = self._scans.get(scan_id)
+        if scan is not None and self.database is not None and scan.created_at.timestamp() < self.database.cutoff():
+            self._scans.pop(scan_id)
+            return None
+        return scan
+
+    def __len__(self) -> int:
+        return len(self._scans)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {'cached': len(self._scans)}
+        if self.database is not None:
+            stats['persisted'] = len(self.database)
+        return stats
+
+    def close(self):
+        if self.database is not None:
+            self.database.close()
@@ -28,13 +28,16 @@ import importlib
 import os
 import asyncio
 from typing import List, Dict
-from models import FootprintResult, QueryInputs
+from models import QueryInputs
+from records import AccountRecord
 from scrapers.base_scraper import Scraper
+from timestamp_normalizer import TimestampNormalizer
 
 
 class ScraperManager:
     def __init__(self):
         self.scrapers: List[Scraper] = []
+        self.timestamp_normalizer = TimestampNormalizer()
         self._load_scrapers()
     
     def _load_scrapers(self):
@@ -79,7 +82,7 @@ class ScraperManager:
                 print(f"Failed to load scraper {module_name}: {e}")
                 continue
     
-    async def run_all_scrapers(self, query_inputs: QueryInputs) -> List[FootprintResult]:
+    async def run_all_scrapers(self, query_inputs: QueryInputs) -> List[AccountRecord]:
         """Run all scrapers in parallel and aggregate results"""
         if not self.scrapers:
             return []
@@ -88,12 +91,14 @@ class ScraperManager:
         tasks = [scraper.search(query_inputs) for scraper in self.scrapers]
         results_lists = await asyncio.gather(*tasks, return_exceptions=True)
         
-        # Aggregate results, filtering out exceptions
+        # Aggregate results, filtering out exceptions. Timestamps are converted to
+        # UTC epoch seconds here so nothing downstream parses them again.
         all_results = []
-        for results in results_lists:
+        for scraper, results in zip(self.scrapers, results_lists):
             if isinstance(results, Exception):
                 continue
             if isinstance(results, list):
+                self.timestamp_normalizer.normalize(results, scraper.timestamp_format, scraper.__class__.__name__)
                 all_results.extend(results)
         
         return all_results
@@ -12,15 +12,20 @@ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
 """
 
 from abc import ABC, abstractmethod
-from typing import List
-from models import FootprintResult, QueryInputs
+from typing import List, Optional
+from models import QueryInputs
+from records import AccountRecord
 
 
 class Scraper(ABC):
     """Base class for all scrapers"""
     
+    # Format of post/comment 'timestamp' values: 'epoch', 'iso8601' or a strptime
+    # format. None lets the timestamp normalizer guess.
+    timestamp_format: Optional[str] = None
+    
     @abstractmethod
-    async def search(self, query_inputs: QueryInputs) -> List[FootprintResult]:
+    async def search(self, query_inputs: QueryInputs) -> List[AccountRecord]:
         """
         Search for digital footprints based on query inputs.
         
@@ -28,7 +33,7 @@ class Scraper(ABC):
             query_inputs: QueryInputs object containing name, usernames, email
             
         Returns:
-            List of FootprintResult objects
+            List of AccountRecord objects
         """
         pass
     
@@ -15,7 +15,8 @@ import os
 import httpx
 from bs4 import BeautifulSoup
 from typing import List
-from models import FootprintResult, QueryInputs, Platform
+from models import QueryInputs, Platform
+from records import AccountRecord, ContentRecord
 from scrapers.base_scraper import Scraper
 
 
@@ -23,7 +24,7 @@ class BingSearchScraper(Scraper):
     def __init__(self):
         self.api_key = os.getenv('BING_SEARCH_API_KEY', '')
     
-    async def search(self, query_inputs: QueryInputs) -> List[FootprintResult]:
+    async def search(self, query_inputs: QueryInputs) -> List[AccountRecord]:
         """Search Bing for digital footprints"""
         results = []
         
@@ -62,17 +63,17 @@ class BingSearchScraper(Scraper):
                     items = data.get('webPages', {}).get('value', [])
                     
                     for item in items:
-                        result = FootprintResult(
+                        result = AccountRecord(
                             platform=Platform.SEARCH_RESULT,
                             username=None,
                             profile_url=item.get('url', ''),
                             profile_name=item.get('name', ''),
                             bio=item.get('snippet', ''),
-                            posts=[{
-                                'title': item.get('name', ''),
-                                'content': item.get('snippet', ''),
-                                'url': item.get('url', '')
-                            }],
+                            posts=[ContentRecord(
+                                title=item.get('name', ''),
+                                content=item.get('snippet', ''),
+                                url=item.get('url', '')
+                            )],
                             comments=[],
                             confidence_score=0.5
                         )
@@ -82,7 +83,7 @@ class BingSearchScraper(Scraper):
         
         return results
     
-    async def _web_search(self, query_inputs: QueryInputs) -> List[FootprintResult]:
+    async def _web_search(self, query_inputs: QueryInputs) -> List[AccountRecord]:
         """Fallback web search when API is not available"""
         results = []
         
@@ -245,19 +246,19 @@ class BingSearchScraper(Scraper):
                                     continue
                                 
                                 if link and title:
-                                    result_obj = FootprintResult(
+                                    result_obj = AccountRecord(
                                         platform=Platform.SEARCH_RESULT,
                                         username=None,
                                         profile_url=link,
                                         profile_name=title,
                                         avatar_url=image_url,
                                         bio=snippet,
-                                        posts=[{
-                                            'title': title,
-                                            'content': snippet,
-                                            'url': link,
-                                            'image_url': image_url
-                                        }],
+                                        posts=[ContentRecord(
+                                            title=title,
+                                            content=snippet,
+                                            url=link,
+                                            extra={'image_url': image_url}
+                                        )],
                                         comments=[],
                                         links=[link] if link else [],
                                         confidence_score=confidence,
@@ -13,12 +13,13 @@ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
 
 import httpx
 from typing import List
-from models import FootprintResult, QueryInputs, Platform
+from models import QueryInputs, Platform
+from records import AccountRecord
 from scrapers.base_scraper import Scraper
 
 
 class DisqusScraper(Scraper):
-    async def search(self, query_inputs: QueryInputs) -> List[FootprintResult]:
+    async def search(self, query_inputs: QueryInputs) -> List[AccountRecord]:
         """Search Disqus for user profiles"""
         results = []
         
@@ -31,7 +32,7 @@ class DisqusScraper(Scraper):
                     response = await client.get(profile_url, follow_redirects=True)
                     
                     if response.status_code == 200:
-                        result = FootprintResult(
+                        result = AccountRecord(
                             platform=Platform.DISQUS,
                             username=clean_username,
                             profile_url=profile_url,
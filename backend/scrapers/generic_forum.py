@@ -13,12 +13,13 @@ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
 
 import httpx
 from typing import List
-from models import FootprintResult, QueryInputs, Platform
+from models import QueryInputs, Platform
+from records import AccountRecord
 from scrapers.base_scraper import Scraper
 
 
 class GenericForumScraper(Scraper):
-    async def search(self, query_inputs: QueryInputs) -> List[FootprintResult]:
+    async def search(self, query_inputs: QueryInputs) -> List[AccountRecord]:
         """Search generic forums for user profiles"""
         results = []
         
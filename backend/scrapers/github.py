@@ -14,16 +14,19 @@ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
 import os
 import httpx
 from typing import List
-from models import FootprintResult, QueryInputs, Platform
+from models import QueryInputs, Platform
+from records import AccountRecord, ContentRecord
 from scrapers.base_scraper import Scraper
 
 
 class GitHubScraper(Scraper):
+    timestamp_format = 'iso8601'
+    
     def __init__(self):
         self.token = os.getenv('GITHUB_TOKEN', '')
         self.base_url = "https://api.github.com"
     
-    async def search(self, query_inputs: QueryInputs) -> List[FootprintResult]:
+    async def search(self, query_inputs: QueryInputs) -> List[AccountRecord]:
         """Search GitHub for user profiles using GitHub API"""
         results = []
         
@@ -56,12 +59,12 @@ class GitHubScraper(Scraper):
                         if repos_response.status_code == 200:
                             repos_data = repos_response.json()
                             for repo in repos_data:
-                                posts.append({
-                                    'title': repo.get('name', ''),
-                                    'content': repo.get('description', ''),
-                                    'url': repo.get('html_url', ''),
-                                    'timestamp': repo.get('updated_at')
-                                })
+                                posts.append(ContentRecord(
+                                    title=repo.get('name', ''),
+                                    content=repo.get('description', ''),
+                                    url=repo.get('html_url', ''),
+                                    timestamp=repo.get('updated_at')
+                                ))
                         
                         # Get user events (activity)
                         events_url = f"{self.base_url}/users/{clean_username}/events/public"
@@ -74,13 +77,13 @@ class GitHubScraper(Scraper):
                                 if event.get('type') in ['IssueCommentEvent', 'PullRequestReviewCommentEvent']:
                                     payload = event.get('payload', {})
                                     comment_data = payload.get('comment', {})
-                                    comments.append({
-                                        'content': comment_data.get('body', ''),
-                                        'url': comment_data.get('html_url', ''),
-                                        'timestamp': event.get('created_at')
-                                    })
+                                    comments.append(ContentRecord(
+                                        content=comment_data.get('body', ''),
+                                        url=comment_data.get('html_url', ''),
+                                        timestamp=event.get('created_at')
+                                    ))
                         
-                        result = FootprintResult(
+                        result = AccountRecord(
                             platform=Platform.OTHER,
                             username=clean_username,
                             profile_url=user_data.get('html_url', f"https://github.com/{clean_username}"),
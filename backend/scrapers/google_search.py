@@ -15,7 +15,8 @@ import os
 import httpx
 from bs4 import BeautifulSoup
 from typing import List
-from models import FootprintResult, QueryInputs, Platform
+from models import QueryInputs, Platform
+from records import AccountRecord, ContentRecord
 from scrapers.base_scraper import Scraper
 
 
@@ -24,7 +25,7 @@ class GoogleSearchScraper(Scraper):
         self.api_key = os.getenv('GOOGLE_SEARCH_API_KEY', '')
         self.engine_id = os.getenv('GOOGLE_SEARCH_ENGINE_ID', '')
     
-    async def search(self, query_inputs: QueryInputs) -> List[FootprintResult]:
+    async def search(self, query_inputs: QueryInputs) -> List[AccountRecord]:
         """Search Google for digital footprints"""
         results = []
         
@@ -62,17 +63,17 @@ class GoogleSearchScraper(Scraper):
                     items = data.get('items', [])
                     
                     for item in items:
-                        result = FootprintResult(
+                        result = AccountRecord(
                             platform=Platform.SEARCH_RESULT,
                             username=None,
                             profile_url=item.get('link', ''),
                             profile_name=item.get('title', ''),
                             bio=item.get('snippet', ''),
-                            posts=[{
-                                'title': item.get('title', ''),
-                                'content': item.get('snippet', ''),
-                                'url': item.get('link', '')
-                            }],
+                            posts=[ContentRecord(
+                                title=item.get('title', ''),
+                                content=item.get('snippet', ''),
+                                url=item.get('link', '')
+                            )],
                             comments=[],
                             confidence_score=0.5
                         )
@@ -82,7 +83,7 @@ class GoogleSearchScraper(Scraper):
         
         return results
     
-    async def _web_search(self, query_inputs: QueryInputs) -> List[FootprintResult]:
+    async def _web_search(self, query_inputs: QueryInputs) -> List[AccountRecord]:
         """Fallback web search when API is not available"""
         results = []
         
@@ -250,19 +251,19 @@ class GoogleSearchScraper(Scraper):
                                     continue
                                 
                                 if link and title:
-                                    result_obj = FootprintResult(
+                                    result_obj = AccountRecord(
                                         platform=Platform.SEARCH_RESULT,
                                         username=None,
                                         profile_url=link,
                                         profile_name=title,
                                         avatar_url=image_url,
                                         bio=snippet,
-                                        posts=[{
-                                            'title': title,
-                                            'content': snippet,
-                                            'url': link,
-                                            'image_url': image_url
-                                        }],
+                                        posts=[ContentRecord(
+                                            title=title,
+                                            content=snippet,
+                                            url=link,
+                                            extra={'image_url': image_url}
+                                        )],
                                         comments=[],
                                         links=[link] if link else [],
                                         confidence_score=confidence,
@@ -14,16 +14,19 @@ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
 import os
 import httpx
 from typing import List
-from models import FootprintResult, QueryInputs, Platform
+from models import QueryInputs, Platform
+from records import AccountRecord, ContentRecord
 from scrapers.base_scraper import Scraper
 
 
 class InstagramScraper(Scraper):
+    timestamp_format = 'iso8601'
+    
     def __init__(self):
         self.access_token = os.getenv('INSTAGRAM_ACCESS_TOKEN', '')
         self.base_url = "https://graph.instagram.com"
     
-    async def search(self, query_inputs: QueryInputs) -> List[FootprintResult]:
+    async def search(self, query_inputs: QueryInputs) -> List[AccountRecord]:
         """Search Instagram for user profiles using Instagram Basic Display API"""
         results = []
         
@@ -58,13 +61,13 @@ class InstagramScraper(Scraper):
                                 if media_response.status_code == 200:
                                     media_data = media_response.json().get('data', [])
                                     for item in media_data:
-                                        posts.append({
-                                            'content': item.get('caption', ''),
-                                            'url': item.get('permalink', ''),
-                                            'timestamp': item.get('timestamp')
-                                        })
+                                        posts.append(ContentRecord(
+                                            content=item.get('caption', ''),
+                                            url=item.get('permalink', ''),
+                                            timestamp=item.get('timestamp')
+                                        ))
                                 
-                                result = FootprintResult(
+                                result = AccountRecord(
                                     platform=Platform.INSTAGRAM,
                                     username=user_data.get('username', clean_username),
                                     profile_url=profile_url,
@@ -82,7 +85,7 @@ class InstagramScraper(Scraper):
                         response = await client.get(profile_url, follow_redirects=True)
                         
                         if response.status_code == 200:
-                            result = FootprintResult(
+                            result = AccountRecord(
                                 platform=Platform.INSTAGRAM,
                                 username=clean_username,
                                 profile_url=profile_url,
@@ -14,12 +14,13 @@ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
 import httpx
 from bs4 import BeautifulSoup
 from typing import List
-from models import FootprintResult, QueryInputs, Platform
+from models import QueryInputs, Platform
+from records import AccountRecord, ContentRecord
 from scrapers.base_scraper import Scraper
 
 
 class MediumScraper(Scraper):
-    async def search(self, query_inputs: QueryInputs) -> List[FootprintResult]:
+    async def search(self, query_inputs: QueryInputs) -> List[AccountRecord]:
         """Search Medium for user profiles"""
         results = []
         
@@ -63,13 +64,13 @@ class MediumScraper(Scraper):
                             title_elem = link.find('h2') or link.find('h3')
                             if title_elem:
                                 title = title_elem.get_text(strip=True)
-                                posts.append({
-                                    'title': title,
-                                    'content': title,
-                                    'url': article_url
-                                })
+                                posts.append(ContentRecord(
+                                    title=title,
+                                    content=title,
+                                    url=article_url
+                                ))
                         
-                        result = FootprintResult(
+                        result = AccountRecord(
                             platform=Platform.MEDIUM,
                             username=clean_username,
                             profile_url=profile_url,
@@ -14,12 +14,13 @@ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
 import httpx
 from bs4 import BeautifulSoup
 from typing import List
-from models import FootprintResult, QueryInputs, Platform
+from models import QueryInputs, Platform
+from records import AccountRecord, ContentRecord
 from scrapers.base_scraper import Scraper
 
 
 class QuoraScraper(Scraper):
-    async def search(self, query_inputs: QueryInputs) -> List[FootprintResult]:
+    async def search(self, query_inputs: QueryInputs) -> List[AccountRecord]:
         """Search Quora for user profiles"""
         results = []
         
@@ -55,13 +56,13 @@ class QuoraScraper(Scraper):
                             answer_url = f"https://quora.com{link.get('href', '')}"
                             answer_text = link.get_text(strip=True)
                             if answer_text:
-                                posts.append({
-                                    'title': answer_text[:100],
-                                    'content': answer_text,
-                                    'url': answer_url
-                                })
+                                posts.append(ContentRecord(
+                                    title=answer_text[:100],
+                                    content=answer_text,
+                                    url=answer_url
+                                ))
                         
-                        result = FootprintResult(
+                        result = AccountRecord(
                             platform=Platform.QUORA,
                             username=clean_username,
                             profile_url=profile_url,
@@ -14,12 +14,15 @@ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
 import os
 import praw
 from typing import List
-from models import FootprintResult, QueryInputs, Platform
+from models import QueryInputs, Platform
+from records import AccountRecord, ContentRecord
 from scrapers.base_scraper import Scraper
 import asyncio
 
 
 class RedditScraper(Scraper):
+    timestamp_format = 'epoch'
+    
     def __init__(self):
         self.client_id = os.getenv('REDDIT_CLIENT_ID', '')
         self.client_secret = os.getenv('REDDIT_CLIENT_SECRET', '')
@@ -34,7 +37,7 @@ class RedditScraper(Scraper):
             except Exception:
                 pass
     
-    async def search(self, query_inputs: QueryInputs) -> List[FootprintResult]:
+    async def search(self, query_inputs: QueryInputs) -> List[AccountRecord]:
         """Search Reddit for user profiles"""
         results = []
         
@@ -53,25 +56,25 @@ class RedditScraper(Scraper):
                 # Get recent posts
                 try:
                     for submission in user.submissions.new(limit=10):
-                        posts.append({
-                            'title': submission.title,
-                            'content': submission.selftext,
-                            'url': f"https://reddit.com{submission.permalink}",
-                            'timestamp': submission.created_utc,
-                            'score': submission.score
-                        })
+                        posts.append(ContentRecord(
+                            title=submission.title,
+                            content=submission.selftext,
+                            url=f"https://reddit.com{submission.permalink}",
+                            timestamp=submission.created_utc,
+                            score=submission.score
+                        ))
                 except Exception:
                     pass
                 
                 # Get recent comments
                 try:
                     for comment in user.comments.new(limit=10):
-                        comments.append({
-                            'content': comment.body,
-                            'url': f"https://reddit.com{comment.permalink}",
-                            'timestamp': comment.created_utc,
-                            'score': comment.score
-                        })
+                        comments.append(ContentRecord(
+                            content=comment.body,
+                            url=f"https://reddit.com{comment.permalink}",
+                            timestamp=comment.created_utc,
+                            score=comment.score
+                        ))
                 except Exception:
                     pass
                 
@@ -84,7 +87,7 @@ class RedditScraper(Scraper):
                 except Exception:
                     pass
                 
-                result = FootprintResult(
+                result = AccountRecord(
                     platform=Platform.REDDIT,
                     username=username,
                     profile_url=f"https://reddit.com/user/{username}",
@@ -14,16 +14,19 @@ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
 import os
 import httpx
 from typing import List
-from models import FootprintResult, QueryInputs, Platform
+from models import QueryInputs, Platform
+from records import AccountRecord, ContentRecord
 from scrapers.base_scraper import Scraper
 
 
 class TwitterScraper(Scraper):
+    timestamp_format = 'iso8601'
+    
     def __init__(self):
         self.bearer_token = os.getenv('TWITTER_BEARER_TOKEN', '')
         self.base_url = "https://api.twitter.com/2"
     
-    async def search(self, query_inputs: QueryInputs) -> List[FootprintResult]:
+    async def search(self, query_inputs: QueryInputs) -> List[AccountRecord]:
         """Search Twitter/X for user profiles using Twitter API v2"""
         results = []
         
@@ -65,14 +68,14 @@ class TwitterScraper(Scraper):
                             if tweets_response.status_code == 200:
                                 tweets_data = tweets_response.json().get('data', [])
                                 for tweet in tweets_data:
-                                    posts.append({
-                                        'content': tweet.get('text', ''),
-                                        'url': f"https://twitter.com/{clean_username}/status/{tweet.get('id')}",
-                                        'timestamp': tweet.get('created_at'),
-                                        'score': tweet.get('public_metrics', {}).get('like_count', 0)
-                                    })
+                                    posts.append(ContentRecord(
+                                        content=tweet.get('text', ''),
+                                        url=f"https://twitter.com/{clean_username}/status/{tweet.get('id')}",
+                                        timestamp=tweet.get('created_at'),
+                                        score=tweet.get('public_metrics', {}).get('like_count', 0)
+                                    ))
                             
-                            result = FootprintResult(
+                            result = AccountRecord(
                                 platform=Platform.TWITTER,
                                 username=clean_username,
                                 profile_url=f"https://twitter.com/{clean_username}",
@@ -13,12 +13,13 @@ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
 
 import httpx
 from typing import List
-from models import FootprintResult, QueryInputs, Platform
+from models import QueryInputs, Platform
+from records import AccountRecord
 from scrapers.base_scraper import Scraper
 
 
 class WordPressScraper(Scraper):
-    async def search(self, query_inputs: QueryInputs) -> List[FootprintResult]:
+    async def search(self, query_inputs: QueryInputs) -> List[AccountRecord]:
         """Search WordPress sites for user profiles"""
         results = []
         
@@ -38,7 +39,7 @@ class WordPressScraper(Scraper):
                             response = await client.get(profile_url, follow_redirects=True)
                             
                             if response.status_code == 200:
-                                result = FootprintResult(
+                                result = AccountRecord(
                                     platform=Platform.WORDPRESS,
                                     username=clean_username,
                                     profile_url=profile_url,
@@ -14,16 +14,19 @@ FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
 import os
 import httpx
 from typing import List
-from models import FootprintResult, QueryInputs, Platform
+from models import QueryInputs, Platform
+from records import AccountRecord, ContentRecord
 from scrapers.base_scraper import Scraper
 
 
 class YouTubeScraper(Scraper):
+    timestamp_format = 'iso8601'
+    
     def __init__(self):
         self.api_key = os.getenv('YOUTUBE_API_KEY', '')
         self.base_url = "https://www.googleapis.com/youtube/v3"
     
-    async def search(self, query_inputs: QueryInputs) -> List[FootprintResult]:
+    async def search(self, query_inputs: QueryInputs) -> List[AccountRecord]:
         """Search YouTube for user channels using YouTube Data API v3"""
         results = []
         
@@ -92,14 +95,14 @@ class YouTubeScraper(Scraper):
                                                 videos_data = videos_response.json().get('items', [])
                                                 for video in videos_data:
                                                     video_snippet = video.get('snippet', {})
-                                                    posts.append({
-                                                        'title': video_snippet.get('title', ''),
-                                                        'content': video_snippet.get('description', ''),
-                                                        'url': f"https://youtube.com/watch?v={video_snippet.get('resourceId', {}).get('videoId')}",
-                                                        'timestamp': video_snippet.get('publishedAt')
-                                                    })
+                                                    posts.append(ContentRecord(
+                                                        title=video_snippet.get('title', ''),
+                                                        content=video_snippet.get('description', ''),
+                                                        url=f"https://youtube.com/watch?v={video_snippet.get('resourceId', {}).get('videoId')}",
+                                                        timestamp=video_snippet.get('publishedAt')
+                                                    ))
                                         
-                                        result = FootprintResult(
+                                        result = AccountRecord(
                                             platform=Platform.YOUTUBE,
                                             username=clean_username,
                                             profile_url=f"https://youtube.com/@{channel_snippet.get('customUrl', clean_username)}",
@@ -0,0 +1,125 @@
+"""
+Copyright (c) 2024 FootprintScan. All Rights Reserved.
+
+This software and associated documentation files (the "Software") are proprietary
+and confidential. Unauthorized copying, modification, distribution, or use of
+this Software, via any medium, is strictly prohibited without express written
+permission from the copyright holder.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+"""
+
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+import numpy as np
+
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Each worker process builds its own analyzer once, in _init_worker
+_worker_sia = None
+
+
+def _init_worker():
+    global _worker_sia
+    from nltk.sentiment import SentimentIntensityAnalyzer
+    _worker_sia = SentimentIntensityAnalyzer()
+
+
+def _score_batch(chunks: List[str]) -> List[float]:
+    return [_worker_sia.polarity_scores(chunk)['compound'] for chunk in chunks]
+
+
+class SentimentScorer:
+    """Batched VADER scoring spread over a process pool.
+
+    VADER is pure Python, so a process pool is the only way to use more
+    than one core for it. Small batches are scored inline, where the
+    inter-process overhead would outweigh the gain.
+    """
+
+    def __init__(self, sia):
+        self.sia = sia
+        self.workers = int(os.getenv('SENTIMENT_WORKERS', str(min(4, os.cpu_count() or 1))))
+        self.batch_size = int(os.getenv('SENTIMENT_BATCH_SIZE', '64'))
+        self.min_parallel = int(os.getenv('SENTIMENT_MIN_PARALLEL', '128'))
+        self.chunk_chars = int(os.getenv('SENTIMENT_CHUNK_CHARS', '1000'))
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # The pool is first needed on an analysis thread; forking a
+                # threaded process can copy locks held by other threads, so
+                # workers start from a clean interpreter instead
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                 mp_context=context)
+            return self._pool
+
+    def split_text(self, text: str) -> List[str]:
+        """Split long text into chunks of at most chunk_chars, preferring sentence boundaries"""
+        if len(text) <= self.chunk_chars:
+            return [text]
+
+        chunks = []
+        current = ''
+        for sentence in _SENTENCE_END_RE.split(text):
+            while len(sentence) > self.chunk_chars:
+                if current:
+                    chunks.append(current)
+                    current = ''
+                chunks.append(sentence[:self.chunk_chars])
+                sentence = sentence[self.chunk_chars:]
+            if current and len(current) + len(sentence) + 1 > self.chunk_chars:
+                chunks.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}" if current else sentence
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def score(self, texts: List[str]) -> np.ndarray:
+        """Return the VADER compound score (-1 to 1) for each text.
+
+        Chunks of a long text are scored separately and averaged, weighted by length.
+        """
+        scores = np.zeros(len(texts))
+        chunks: List[str] = []
+        owners: List[int] = []
+        for i, text in enumerate(texts):
+            if not text:
+                continue
+            for chunk in self.split_text(text):
+                chunks.append(chunk)
+                owners.append(i)
+
+        if not chunks:
+            return scores
+
+        if self.workers > 1 and len(chunks) >= self.min_parallel:
+            batches = [chunks[i:i + self.batch_size] for i in range(0, len(chunks), self.batch_size)]
+            chunk_scores = [value for batch in self._get_pool().map(_score_batch, batches) for value in batch]
+        else:
+            chunk_scores = [self.sia.polarity_scores(chunk)['compound'] for chunk in chunks]
+
+        owners_array = np.array(owners)
+        weights = np.array([len(chunk) for chunk in chunks], dtype=float)
+        weighted = np.bincount(owners_array, weights=weights * np.array(chunk_scores), minlength=len(texts))
+        total = np.bincount(owners_array, weights=weights, minlength=len(texts))
+        np.divide(weighted, total, out=scores, where=total > 0)
+        return scores
+
+    def close(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
@@ -0,0 +1,102 @@
+"""
+Copyright (c) 2024 FootprintScan. All Rights Reserved.
+
+This software and associated documentation files (the "Software") are proprietary
+and confidential. Unauthorized copying, modification, distribution, or use of
+this Software, via any medium, is strictly prohibited without express written
+permission from the copyright holder.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+"""
+
+from typing import Any, Dict, Iterable, Optional, Union, get_args, get_origin
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+def dumps(content: Any, include: Optional[Dict[str, Any]] = None) -> bytes:
+    """Serialize a pydantic model or plain data to JSON bytes with orjson.
+    
+    include is a pydantic include mapping (see field_projection); fields left
+    out of it are never visited.
+    """
+    if isinstance(content, BaseModel):
+        content = content.model_dump(include=include)
+    return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+def field_projection(model: type, fields: str, extra_fields: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    Turn a fields parameter into a pydantic include mapping for model.
+    
+    fields is comma separated and nested fields are dotted, e.g.
+    'summary,risk_analysis.post_id,risk_analysis.flags'. Lists and dicts of
+    models are projected per item. Names in extra_fields are accepted at the
+    top level as they are. Raises ValueError for an unknown field.
+    """
+    extra_fields = set(extra_fields)
+    include: Dict[str, Any] = {}
+    for path in fields.split(','):
+        path = path.strip()
+        if not path:
+            continue
+        if path in extra_fields:
+            _merge_include(include, {path: True})
+        else:
+            _merge_include(include, _path_include(model, path.split('.'), path))
+    return include
+
+
+def _path_include(annotation: Any, parts: list, path: str) -> Union[bool, Dict[str, Any]]:
+    if not parts:
+        return True
+    
+    # Optional[X] -> X
+    if get_origin(annotation) is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            annotation = args[0]
+    # Free-form data such as Dict[str, Any] is projected by key
+    if annotation is Any or (get_origin(annotation) is dict and get_args(annotation)[-1] is Any):
+        return {parts[0]: _path_include(Any, parts[1:], path)}
+    # List[X] and Dict[str, X] project every item
+    if get_origin(annotation) in (list, dict):
+        return {'__all__': _path_include(get_args(annotation)[-1], parts, path)}
+    
+    if not (isinstance(annotation, type) and issubclass(annotation, BaseModel)) or parts[0] not in annotation.model_fields:
+        raise ValueError(f"Unknown field '{path}'")
+    return {parts[0]: _path_include(annotation.model_fields[parts[0]].annotation, parts[1:], path)}
+
+
+def _merge_include(target: Dict[str, Any], other: Dict[str, Any]):
+    for key, value in other.items():
+        current = target.get(key)
+        if current is None:
+            target[key] = value
+        elif current is True or value is True:
+            target[key] = True
+        else:
+            _merge_include(current, value)
+
+
+class ModelJSONResponse(ORJSONResponse):
+    """
+    orjson response that also takes pydantic models.
+    
+    Returning one from an endpoint skips FastAPI's response_model pass, which
+    dumps, re-validates and re-encodes the whole object tree. Use it for models
+    the server built itself. include limits the output to a projection.
+    """
+    
+    def __init__(self, content: Any, *args, include: Optional[Dict[str, Any]] = None, **kwargs):
+        # render() runs inside the base __init__, so include must be set first
+        self.include = include
+        super().__init__(content, *args, **kwargs)
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content, self.include)
@@ -0,0 +1,83 @@
+"""
+Copyright (c) 2024 FootprintScan. All Rights Reserved.
+
+This software and associated documentation files (the "Software") are proprietary
+and confidential. Unauthorized copying, modification, distribution, or use of
+this Software, via any medium, is strictly prohibited without express written
+permission from the copyright holder.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+"""
+
+import hashlib
+import re
+from typing import Dict, List, Optional
+import numpy as np
+
+_WORD_RE = re.compile(r'\w+')
+_BITS = np.arange(64, dtype=np.uint64)
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def simhash64(text: str) -> Optional[int]:
+    """64-bit SimHash over word unigrams and bigrams; None for text without words (e.g. emoji only)"""
+    words = _WORD_RE.findall(text.lower())
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    if not features:
+        return None
+
+    hashes = np.array([_feature_hash(feature) for feature in features], dtype=np.uint64)
+    bits = ((hashes[:, None] >> _BITS) & np.uint64(1)).astype(np.int64)
+    # A bit is set when more features have it set than not
+    votes = bits.sum(axis=0) * 2 - len(features)
+    return int(np.sum(np.left_shift(np.uint64(1), _BITS[votes > 0])))
+
+
+def group_near_duplicates(fingerprints: List[Optional[int]], max_distance: int = 3) -> List[int]:
+    """Map each fingerprint to the index of the first earlier one within max_distance bits.
+
+    The 64 bits are split into max_distance + 1 blocks; by the pigeonhole
+    principle two fingerprints within max_distance bits agree exactly on at
+    least one block, so only fingerprints sharing a block are compared.
+    Items that start a new group map to themselves, as do items without a
+    fingerprint, which are never grouped.
+    """
+    if max_distance < 0:
+        return list(range(len(fingerprints)))
+
+    blocks = max_distance + 1
+    ranges = []
+    start = 0
+    for b in range(blocks):
+        width = 64 // blocks + (1 if b < 64 % blocks else 0)
+        ranges.append((start, (1 << width) - 1))
+        start += width
+
+    buckets: List[Dict[int, List[int]]] = [{} for _ in range(blocks)]
+    representative: List[int] = []
+    for i, fingerprint in enumerate(fingerprints):
+        if fingerprint is None:
+            representative.append(i)
+            continue
+
+        match = -1
+        for bucket, (shift, mask) in zip(buckets, ranges):
+            for j in bucket.get((fingerprint >> shift) & mask, ()):
+                if (fingerprint ^ fingerprints[j]).bit_count() <= max_distance:
+                    match = j
+                    break
+            if match >= 0:
+                break
+
+        if match < 0:
+            match = i
+            for bucket, (shift, mask) in zip(buckets, ranges):
+                bucket.setdefault((fingerprint >> shift) & mask, []).append(i)
+        representative.append(match)
+
+    return representative
@@ -0,0 +1,29 @@
+import asyncio
+import threading
+
+from analysis_executor import AnalysisExecutor
+
+
+def test_cancelled_queued_job_leaves_the_queue():
+    executor = AnalysisExecutor(max_concurrent=1, small_job_size=0)
+    release = threading.Event()
+    ran = []
+
+    async def scenario():
+        blocker = asyncio.ensure_future(executor.run(release.wait, size=1))
+        queued = asyncio.ensure_future(executor.run(ran.append, 'late', size=1))
+        try:
+            await asyncio.sleep(0.05)
+            assert executor.stats()['queued'] == 1
+
+            queued.cancel()
+            await asyncio.gather(queued, return_exceptions=True)
+            assert executor.stats()['queued'] == 0
+        finally:
+            release.set()
+            await blocker
+
+    asyncio.run(scenario())
+    executor.close()
+    assert executor.stats()['queued'] == 0
+    assert ran == []
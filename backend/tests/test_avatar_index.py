@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from avatar_index import AvatarIndex
+from link_index import LinkIndex
+from models import Platform
+from records import AccountRecord
+
+
+def test_query_returns_avatars_within_distance(tmp_path):
+    path = str(tmp_path / 'avatars.tsv')
+    index = AvatarIndex(path)
+    index.add('ffffffffffffffff', 'https://reddit.com/u/a')
+    index.add('fffffffffffffff0', 'https://twitter.com/b')  # 4 bits away
+    index.add('0000000000000000', 'https://youtube.com/c')
+    index.close()
+
+    # Reloaded from its file
+    index = AvatarIndex(path)
+    assert index.query('ffffffffffffffff', 4) == [('https://reddit.com/u/a', 0), ('https://twitter.com/b', 4)]
+    assert index.query('ffffffffffffffff', 3) == [('https://reddit.com/u/a', 0)]
+    index.close()
+
+
+def test_query_can_be_limited_to_given_refs():
+    index = AvatarIndex()
+    # A default avatar shared by many accounts from earlier scans
+    for k in range(1000):
+        index.add('ffffffffffffffff', f"https://reddit.com/u/old{k}")
+    index.add('ffffffffffffffff', 'https://reddit.com/u/a')
+    index.add('fffffffffffffff0', 'https://twitter.com/b')
+
+    refs = {'https://reddit.com/u/a', 'https://twitter.com/b', 'https://youtube.com/c'}
+    assert index.query('ffffffffffffffff', 4, refs) == [('https://reddit.com/u/a', 0), ('https://twitter.com/b', 4)]
+    assert len(index.query('ffffffffffffffff', 4)) == 1002
+
+
+def test_linker_takes_avatar_candidates_from_the_index():
+    pytest.importorskip('imagehash')
+    pytest.importorskip('sentence_transformers')
+    from identity_linker import IdentityLinker
+    from identity_matcher import IdentityMatcher
+    from minhash import MinHasher
+
+    # Only the parts candidate_pairs uses; the embedding model is not loaded
+    matcher = IdentityMatcher.__new__(IdentityMatcher)
+    matcher.avatar_index = AvatarIndex()
+    matcher.avatar_match_distance = 10
+    matcher.minhasher = MinHasher(num_perm=128, bands=32)
+    linker = IdentityLinker(matcher)
+
+    results = [
+        AccountRecord(platform=Platform.REDDIT, profile_url='https://reddit.com/u/alpha', confidence_score=0.5, username='alpha'),
+        AccountRecord(platform=Platform.TWITTER, profile_url='https://twitter.com/zulu', confidence_score=0.5, username='zulu'),
+        AccountRecord(platform=Platform.YOUTUBE, profile_url='https://youtube.com/@mike', confidence_score=0.5, username='mike')
+    ]
+    # 8 bits apart, 2 in every 16-bit block: no exact block match, but within avatar_match_distance
+    hashes = ['ffffffffffffffff', 'fffcfffcfffcfffc', '0000000000000000']
+    for result, phash in zip(results, hashes):
+        matcher.avatar_index.add(phash, result.profile_url)
+    # Accounts from earlier scans with the same avatar are not blocked with this scan's
+    for k in range(100):
+        matcher.avatar_index.add(hashes[0], f"https://reddit.com/u/old{k}")
+    # Distinct text signatures, so no MinHash band is shared
+    signatures = [np.full(128, k + 1, dtype=np.uint64) for k in range(len(results))]
+
+    scan_refs = {result.profile_url for result in results}
+    assert matcher.find_similar_avatars(hashes[0], refs=scan_refs) == [('https://reddit.com/u/alpha', 0), ('https://twitter.com/zulu', 8)]
+    assert linker.candidate_pairs(results, hashes, LinkIndex(), signatures) >= {(0, 1)}
+    assert (0, 2) not in linker.candidate_pairs(results, hashes, LinkIndex(), signatures)
@@ -0,0 +1,30 @@
+import asyncio
+
+import httpx
+
+from avatar_pipeline import AvatarHasher
+
+
+def _hasher(handler) -> AvatarHasher:
+    hasher = AvatarHasher()
+    hasher._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return hasher
+
+
+def test_network_errors_are_not_cached():
+    def handler(request):
+        raise httpx.ConnectTimeout('timed out', request=request)
+
+    hasher = _hasher(handler)
+    assert asyncio.run(hasher.hash('https://example.com/a.png')) is None
+    assert 'https://example.com/a.png' not in hasher.cache
+
+
+def test_failed_avatars_are_cached_briefly():
+    hasher = _hasher(lambda request: httpx.Response(404))
+    hasher.negative_ttl = 0.05
+    assert asyncio.run(hasher.hash('https://example.com/a.png')) is None
+    assert 'https://example.com/a.png' in hasher.cache
+
+    asyncio.run(asyncio.sleep(0.1))
+    assert 'https://example.com/a.png' not in hasher.cache
@@ -0,0 +1,75 @@
+import gzip
+
+import brotli
+import pytest
+import zstandard
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from compression import CompressionMiddleware, negotiate_encoding
+
+LARGE = 'footprint ' * 500
+SMALL = 'footprint'
+
+
+def _client() -> TestClient:
+    async def large(request):
+        return PlainTextResponse(LARGE)
+
+    async def small(request):
+        return PlainTextResponse(SMALL)
+
+    async def streamed(request):
+        async def chunks():
+            for _ in range(3):
+                yield LARGE
+        return StreamingResponse(chunks(), media_type='text/plain')
+
+    app = Starlette(routes=[Route('/large', large), Route('/small', small), Route('/streamed', streamed)])
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    return TestClient(app)
+
+
+def _get(path: str, encoding: str):
+    """Headers and the body as sent, before httpx decodes it"""
+    with _client().stream('GET', path, headers={'Accept-Encoding': encoding}) as response:
+        return response.headers, b''.join(response.iter_raw())
+
+
+def _decode(encoding: str, body: bytes) -> bytes:
+    if encoding == 'br':
+        return brotli.decompress(body)
+    if encoding == 'zstd':
+        return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    return gzip.decompress(body)
+
+
+@pytest.mark.parametrize('encoding', ['br', 'zstd', 'gzip'])
+def test_large_bodies_are_encoded(encoding):
+    headers, body = _get('/large', encoding)
+    assert headers['content-encoding'] == encoding
+    assert 'accept-encoding' in headers['vary'].lower()
+    assert _decode(encoding, body) == LARGE.encode()
+
+
+@pytest.mark.parametrize('encoding', ['br', 'zstd'])
+def test_streamed_bodies_are_encoded(encoding):
+    headers, body = _get('/streamed', encoding)
+    assert headers['content-encoding'] == encoding
+    assert _decode(encoding, body) == (LARGE * 3).encode()
+
+
+@pytest.mark.parametrize('encoding', ['br', 'zstd', 'gzip'])
+def test_small_bodies_pass_through(encoding):
+    headers, body = _get('/small', encoding)
+    assert 'content-encoding' not in headers
+    assert body == SMALL.encode()
+
+
+def test_negotiation_prefers_zstd_then_brotli():
+    assert negotiate_encoding('gzip, br, zstd') == 'zstd'
+    assert negotiate_encoding('gzip, br') == 'br'
+    assert negotiate_encoding('br;q=0.5, gzip') == 'gzip'
+    assert negotiate_encoding('identity') is None
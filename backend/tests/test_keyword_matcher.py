@@ -0,0 +1,33 @@
+from keyword_matcher import KeywordMatcher
+
+
+def _matcher() -> KeywordMatcher:
+    return KeywordMatcher({
+        'toxicity': ['hate', 'fool', 'idiot', 'shut up'],
+        'hate_speech': ['racist'],
+        'political_intensity': {'left': 0.5, 'vote': 1.0}
+    })
+
+
+def test_terms_match_on_word_boundaries():
+    matcher = _matcher()
+    assert matcher.match_terms('leftover pizza')['political_intensity'] == []
+    assert matcher.match_terms('whatever')['toxicity'] == []
+    assert matcher.match_terms('the left wing')['political_intensity'] == ['left']
+
+
+def test_plurals_and_inflections_match():
+    matcher = _matcher()
+    assert matcher.match_terms('racists everywhere')['hate_speech'] == ['racist']
+    assert matcher.match_terms('fools and idiots')['toxicity'] == ['fool', 'idiot']
+    assert matcher.match_terms('i hated that foolish thing')['toxicity'] == ['hate', 'fool']
+    assert matcher.match_terms('hating it')['toxicity'] == ['hate']
+    assert matcher.match_terms('haters gonna hate')['toxicity'] == ['hate']
+    assert matcher.match_terms('voting and voters')['political_intensity'] == ['vote']
+    assert matcher.match_terms('a hat')['toxicity'] == []
+
+
+def test_each_distinct_term_counts_once():
+    matcher = _matcher()
+    scores = matcher.scan('hate, hated, hating. shut  up you fool. left, left, vote')
+    assert scores == {'toxicity': 3.0, 'hate_speech': 0.0, 'political_intensity': 1.5}
@@ -0,0 +1,27 @@
+from urllib.parse import quote
+
+from link_index import LinkIndex, normalize_link
+
+
+def test_equivalent_links_normalize_alike():
+    assert normalize_link("https://www.Example.com/page/?utm_source=x#top") == "example.com/page"
+    assert normalize_link("https://out.reddit.com/?url=https%3A%2F%2Fexample.com%2Fpage") == "example.com/page"
+
+
+def test_malformed_link_does_not_raise():
+    assert normalize_link("http://[::1") == "http://[::1"
+
+
+def test_link_wrapped_more_than_three_times_describes_last_target():
+    url = "https://example.com/final"
+    for _ in range(4):
+        url = "https://out.reddit.com/?url=" + quote(url, safe='')
+    # Three wrappers are followed; the result describes the innermost one
+    assert normalize_link(url) == "out.reddit.com?url=https%3A%2F%2Fexample.com%2Ffinal"
+
+
+def test_index_tolerates_malformed_links():
+    index = LinkIndex()
+    index.add(0, ["http://[::1", "https://example.com"])
+    index.add(1, ["example.com/"])
+    assert index.overlaps() == {(0, 1): 0.5}
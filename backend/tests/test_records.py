@@ -0,0 +1,31 @@
+from models import Platform
+from records import AccountRecord, ContentRecord
+from timestamp_normalizer import TimestampNormalizer
+
+
+def test_api_items_keep_the_scraped_timestamp():
+    account = AccountRecord(
+        platform=Platform.TWITTER,
+        profile_url='https://twitter.com/jdoe',
+        confidence_score=0.5,
+        posts=[
+            ContentRecord(content='hello', url='https://twitter.com/jdoe/1', timestamp='2023-11-14T22:13:20.000Z',
+                          extra={'image_url': 'https://example.com/a.png'}),
+            ContentRecord(content='no time', timestamp='not a date')
+        ]
+    )
+    TimestampNormalizer().normalize([account], 'iso8601', 'twitter')
+
+    assert account.posts[0].epoch == 1700000000.0
+    assert account.posts[1].epoch is None
+    assert account.to_model().posts == [
+        {'image_url': 'https://example.com/a.png', 'content': 'hello', 'url': 'https://twitter.com/jdoe/1',
+         'timestamp': '2023-11-14T22:13:20.000Z'},
+        {'content': 'no time', 'timestamp': 'not a date'}
+    ]
+
+
+def test_epoch_only_items_get_an_iso_timestamp():
+    assert ContentRecord(content='hi', epoch=1700000000.0).to_dict() == {
+        'content': 'hi', 'timestamp': '2023-11-14T22:13:20+00:00'
+    }
@@ -0,0 +1,52 @@
+import threading
+import time
+from typing import List
+
+import numpy as np
+import pytest
+
+from risk_model import BatchingRiskModel, RiskModel, RiskModelOverloaded
+
+
+class RecordingModel(RiskModel):
+    batcher = None
+    max_pending = 0
+
+    def predict(self, texts: List[str]) -> np.ndarray:
+        self.max_pending = max(self.max_pending, self.batcher.stats()['pending'])
+        return np.full((len(texts), 2), 0.5)
+
+
+def test_large_request_stays_within_queue_limit():
+    model = RecordingModel()
+    batcher = model.batcher = BatchingRiskModel(model, max_batch_size=2, max_wait=0.001, max_queue=4)
+
+    predictions = batcher.predict([f"text {i}" for i in range(11)])
+
+    assert predictions.shape == (11, 2)
+    assert model.max_pending <= 4
+    assert batcher.stats()['pending'] == 0
+    batcher.close()
+
+
+def test_request_over_limit_is_rejected_while_queue_is_busy():
+    release = threading.Event()
+
+    class BlockingModel(RiskModel):
+        def predict(self, texts: List[str]) -> np.ndarray:
+            release.wait()
+            return np.zeros((len(texts), 2))
+
+    batcher = BatchingRiskModel(BlockingModel(), max_batch_size=2, max_wait=0.001, max_queue=4)
+    worker = threading.Thread(target=batcher.predict, args=(['a', 'b', 'c'],))
+    worker.start()
+    try:
+        while batcher.stats()['pending'] < 3:
+            time.sleep(0.001)
+        with pytest.raises(RiskModelOverloaded):
+            batcher.predict(['d'] * 10)
+        assert batcher.stats()['overloaded'] == 1
+    finally:
+        release.set()
+        worker.join()
+    batcher.close()
@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+
+from models import QueryInputs, ScanResponse
+from scan_database import ScanDatabase
+from scan_store import ScanStore, StoredScan
+from timeline_builder import Timeline
+
+
+def _scan(scan_id: str, age_days: float) -> StoredScan:
+    response = ScanResponse(accounts_found=0, scan_id=scan_id, scan_timestamp=datetime.now())
+    return StoredScan(
+        response,
+        Timeline.from_rows([]),
+        QueryInputs(name='Jane Doe'),
+        '2024.1',
+        created_at=datetime.now() - timedelta(days=age_days)
+    )
+
+
+def test_scans_past_retention_are_not_served(tmp_path):
+    database = ScanDatabase(str(tmp_path / 'scans.db'), retention_days=30, purge_interval=3600)
+    store = ScanStore(database=database)
+    store.put(_scan('fresh', 1))
+    store.put(_scan('expired', 31))
+
+    # Not purged yet, and still in memory
+    assert len(database) == 2
+    assert store.get('fresh') is not None
+    assert store.get_cached('expired') is None
+    assert store.get('expired') is None
+    assert database.load('expired') is None
+    assert [scan['scan_id'] for scan in database.find(name='Jane Doe')] == ['fresh']
+    store.close()
+
+
+def test_retention_off_keeps_old_scans(tmp_path):
+    database = ScanDatabase(str(tmp_path / 'scans.db'), retention_days=0)
+    store = ScanStore(database=database)
+    store.put(_scan('old', 400))
+
+    assert store.get('old') is not None
+    assert database.load('old') is not None
+    store.close()
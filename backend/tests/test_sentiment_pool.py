@@ -0,0 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from sentiment_pool import SentimentScorer
+
+sentiment = pytest.importorskip('nltk.sentiment')
+
+
+def test_pool_scores_match_inline_scores_from_a_worker_thread():
+    try:
+        sia = sentiment.SentimentIntensityAnalyzer()
+    except LookupError:
+        pytest.skip('vader_lexicon is not downloaded')
+    texts = ['I love this, it is great!', 'This is awful and I hate it.', 'The sky is blue.'] * 4
+
+    inline = SentimentScorer(sia)
+    inline.workers = 1
+    pooled = SentimentScorer(sia)
+    pooled.workers = 2
+    pooled.min_parallel = 1
+    pooled.batch_size = 4
+    try:
+        with ThreadPoolExecutor(max_workers=1) as threads:
+            scores = threads.submit(pooled.score, texts).result(timeout=60)
+        assert pooled._pool._mp_context.get_start_method() != 'fork'
+    finally:
+        pooled.close()
+
+    np.testing.assert_allclose(scores, inline.score(texts))
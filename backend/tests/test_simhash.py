@@ -0,0 +1,20 @@
+from simhash import group_near_duplicates, simhash64
+
+
+def test_near_identical_texts_share_a_group():
+    fingerprints = [
+        simhash64("check out my new video about cooking pasta at home tonight"),
+        simhash64("check out my new video about cooking pasta at home tonight!"),
+        simhash64("completely unrelated post about football results")
+    ]
+    assert group_near_duplicates(fingerprints) == [0, 0, 2]
+
+
+def test_text_without_words_has_no_fingerprint():
+    assert simhash64("😀😀") is None
+    assert simhash64("!!!") is None
+
+
+def test_emoji_only_posts_are_not_grouped():
+    fingerprints = [simhash64("😀😀"), simhash64("🔥🔥🔥"), simhash64("!!!")]
+    assert group_near_duplicates(fingerprints) == [0, 1, 2]
@@ -0,0 +1,29 @@
+import pytest
+
+from timestamp_normalizer import TimestampNormalizer
+
+
+@pytest.mark.parametrize('value, expected', [
+    (1700000000, 1700000000.0),
+    ('1700000000', 1700000000.0),
+    (1700000000123, 1700000000.123),  # milliseconds
+    (1.7e15, 1.7e9),  # microseconds
+    (1.7e18, 1.7e9),  # nanoseconds
+])
+def test_epoch_scales(value, expected):
+    assert TimestampNormalizer().parse(value, 'epoch') == pytest.approx(expected)
+
+
+def test_iso8601_is_utc():
+    assert TimestampNormalizer().parse('2023-11-14T22:13:20Z', 'iso8601') == 1700000000.0
+    assert TimestampNormalizer().parse('2023-11-14T22:13:20', 'iso8601') == 1700000000.0
+
+
+@pytest.mark.parametrize('value', ['nan', 'inf', '-inf', float('nan'), float('inf'), -5, 1e30, True, 'yesterday'])
+def test_invalid_epochs_are_unparseable(value):
+    assert TimestampNormalizer().parse(value, 'epoch') is None
+
+
+@pytest.mark.parametrize('value', ['nan', 'inf', '0001-01-01', '9999-12-31T00:00:00'])
+def test_out_of_range_guesses_are_unparseable(value):
+    assert TimestampNormalizer().parse(value) is None
@@ -24,134 +24,306 @@ IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
 FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
 """
 
-from typing import List, Dict, Any
-from datetime import datetime
-from models import TimelineEntry, Platform, FootprintResult
+import heapq
+from itertools import repeat
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+from datetime import datetime, timezone
+import numpy as np
+from models import TimelineEntry, Platform
+from records import AccountRecord
+
+HISTOGRAM_GRANULARITIES = ('day', 'week', 'month')
+
+
+class Timeline:
+    """
+    Time-ordered timeline events held as columns.
+    
+    TimelineEntry objects are only built for the window that is asked for.
+    """
+    
+    def __init__(
+        self,
+        timestamps: np.ndarray,
+        risk_scores: np.ndarray,
+        flagged: np.ndarray,
+        platform_codes: np.ndarray,
+        platforms: List[Platform],
+        events: List[tuple]
+    ):
+        self.timestamps = timestamps  # int64 epoch seconds, ascending
+        self.risk_scores = risk_scores
+        self.flagged = flagged
+        self.platform_codes = platform_codes  # index into platforms
+        self.platforms = platforms
+        self._events = events  # (platform, type, content, url, duplicate_of)
+        self._platform_positions: Dict[Platform, np.ndarray] = {}
+    
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple]) -> 'Timeline':
+        """Rebuild a Timeline from the output of rows(), e.g. read back from the scan database"""
+        platforms: List[Platform] = []
+        timestamps: List[int] = []
+        risk_scores: List[float] = []
+        flagged: List[bool] = []
+        platform_codes: List[int] = []
+        events: List[tuple] = []
+        for timestamp, platform, entry_type, content, url, risk_score, is_flagged, duplicate_of in rows:
+            platform = Platform(platform)
+            if platform not in platforms:
+                platforms.append(platform)
+            timestamps.append(timestamp)
+            risk_scores.append(risk_score)
+            flagged.append(bool(is_flagged))
+            platform_codes.append(platforms.index(platform))
+            events.append((platform, entry_type, content, url, duplicate_of))
+        return cls(
+            np.array(timestamps, dtype=np.int64),
+            np.array(risk_scores, dtype=float),
+            np.array(flagged, dtype=bool),
+            np.array(platform_codes, dtype=np.int64),
+            platforms,
+            events
+        )
+    
+    def __len__(self) -> int:
+        return len(self._events)
+    
+    def rows(self) -> Iterator[tuple]:
+        """(timestamp, platform, type, content, url, risk_score, flagged, duplicate_of) per event, in order"""
+        columns = zip(self.timestamps.tolist(), self.risk_scores.tolist(), self.flagged.tolist(), self._events)
+        for timestamp, risk_score, is_flagged, (platform, entry_type, content, url, duplicate_of) in columns:
+            yield (timestamp, platform.value, entry_type, content, url, risk_score, is_flagged, duplicate_of)
+    
+    def index_range(self, start_ts: Optional[int] = None, end_ts: Optional[int] = None) -> Tuple[int, int]:
+        """Positions of the events with start_ts <= timestamp <= end_ts"""
+        start = 0 if start_ts is None else int(np.searchsorted(self.timestamps, start_ts, side='left'))
+        stop = len(self) if end_ts is None else int(np.searchsorted(self.timestamps, end_ts, side='right'))
+        return start, max(start, stop)
+    
+    def entry(self, i: int) -> TimelineEntry:
+        platform, entry_type, content, url, duplicate_of = self._events[i]
+        return TimelineEntry.model_construct(
+            timestamp=datetime.fromtimestamp(int(self.timestamps[i]), tz=timezone.utc),
+            platform=platform,
+            type=entry_type,
+            content=content[:200],  # Truncate for display
+            url=url,
+            risk_score=float(self.risk_scores[i]),
+            duplicate_of=duplicate_of
+        )
+    
+    def entries(self, start: int = 0, stop: Optional[int] = None) -> List[TimelineEntry]:
+        stop = len(self) if stop is None else min(stop, len(self))
+        return [self.entry(i) for i in range(start, stop)]
+    
+    def window(self, start_ts: Optional[int] = None, end_ts: Optional[int] = None) -> List[TimelineEntry]:
+        return self.entries(*self.index_range(start_ts, end_ts))
+    
+    def platform_positions(self, platform: Platform) -> np.ndarray:
+        """Ascending positions of one platform's events, indexed on first use"""
+        positions = self._platform_positions.get(platform)
+        if positions is None:
+            if platform in self.platforms:
+                positions = np.flatnonzero(self.platform_codes == self.platforms.index(platform))
+            else:
+                positions = np.zeros(0, dtype=np.int64)
+            self._platform_positions[platform] = positions
+        return positions
+    
+    def query(
+        self,
+        start_ts: Optional[int] = None,
+        end_ts: Optional[int] = None,
+        platform: Optional[Platform] = None,
+        min_risk: Optional[float] = None,
+        cursor: int = 0,
+        limit: int = 100
+    ) -> Tuple[List[TimelineEntry], Optional[int], int]:
+        """
+        Page through events matching a time range, platform and minimum risk.
+        
+        The cursor is the position to resume from, as returned by the previous page.
+        
+        Returns:
+            (entries, next cursor or None on the last page, total matching events)
+        """
+        if platform is None:
+            start, stop = self.index_range(start_ts, end_ts)
+            positions = np.arange(start, stop, dtype=np.int64)
+        else:
+            positions = self.platform_positions(platform)
+            timestamps = self.timestamps[positions]
+            start = 0 if start_ts is None else int(np.searchsorted(timestamps, start_ts, side='left'))
+            stop = len(positions) if end_ts is None else int(np.searchsorted(timestamps, end_ts, side='right'))
+            positions = positions[start:max(start, stop)]
+        
+        if min_risk is not None:
+            positions = positions[self.risk_scores[positions] >= min_risk]
+        total = len(positions)
+        
+        if cursor:
+            positions = positions[np.searchsorted(positions, cursor, side='left'):]
+        page = positions[:limit]
+        next_cursor = int(page[-1]) + 1 if len(positions) > limit else None
+        
+        return [self.entry(int(i)) for i in page], next_cursor, total
+    
+    def histogram(
+        self,
+        granularity: str = 'day',
+        start_ts: Optional[int] = None,
+        end_ts: Optional[int] = None,
+        platform: Optional[Platform] = None
+    ) -> Dict[str, Any]:
+        """
+        Event counts, mean and max risk and flagged counts per platform per time bucket.
+        
+        Buckets are UTC days, weeks starting on Monday, or calendar months, and are
+        labelled by their start in epoch seconds. Returns parallel columns sorted by
+        bucket, then platform; empty buckets are left out.
+        """
+        if granularity not in HISTOGRAM_GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+        
+        start, stop = self.index_range(start_ts, end_ts)
+        timestamps = self.timestamps[start:stop]
+        codes = self.platform_codes[start:stop]
+        risk_scores = self.risk_scores[start:stop]
+        flagged = self.flagged[start:stop]
+        if platform is not None:
+            keep = codes == (self.platforms.index(platform) if platform in self.platforms else -1)
+            timestamps, codes, risk_scores, flagged = timestamps[keep], codes[keep], risk_scores[keep], flagged[keep]
+        
+        if granularity == 'day':
+            buckets = timestamps // 86400 * 86400
+        elif granularity == 'week':
+            # Epoch day 0 was a Thursday; shift so weeks start on Monday
+            buckets = ((timestamps // 86400 + 3) // 7 * 7 - 3) * 86400
+        else:
+            buckets = timestamps.astype('datetime64[s]').astype('datetime64[M]').astype('datetime64[s]').astype(np.int64)
+        
+        # One group per (bucket, platform); timestamps are sorted, so groups come out in bucket order
+        n_platforms = max(1, len(self.platforms))
+        group_keys, groups = np.unique(buckets * n_platforms + codes, return_inverse=True)
+        group_codes = group_keys % n_platforms
+        counts = np.bincount(groups, minlength=len(group_keys))
+        max_risk = np.zeros(len(group_keys))
+        np.maximum.at(max_risk, groups, risk_scores)
+        
+        return {
+            'bucket_start': group_keys // n_platforms,
+            'platform': [self.platforms[code].value for code in group_codes.tolist()],
+            'count': counts,
+            'mean_risk': np.bincount(groups, weights=risk_scores, minlength=len(group_keys)) / np.maximum(counts, 1),
+            'max_risk': max_risk,
+            'flagged': np.bincount(groups, weights=flagged, minlength=len(group_keys)).astype(np.int64)
+        }
 
 
 class TimelineBuilder:
-    def build_timeline(self, footprints: Dict[str, List[FootprintResult]], risk_analysis: List[Dict[str, Any]]) -> List[TimelineEntry]:
+    def build_timeline(self, footprints: Dict[str, List[AccountRecord]], risk_analysis: List[Dict[str, Any]]) -> List[TimelineEntry]:
         """Build chronological timeline from all footprints and risk analysis"""
-        timeline_entries = []
+        return self.build_index(footprints, risk_analysis).entries()
+    
+    def build_index(self, footprints: Dict[str, List[AccountRecord]], risk_analysis: List[Dict[str, Any]]) -> Timeline:
+        """
+        Build a Timeline by sorting each account's events and merging the sorted streams.
         
+        Items without an epoch (see TimestampNormalizer) are left out. Events
+        with equal timestamps keep account order, then their order within the account.
+        """
         # Create risk lookup by content/URL
         risk_lookup = {}
+        duplicate_of = {}
         for risk in risk_analysis:
             key = risk.get('url') or risk.get('post_id', '')
             risk_lookup[key] = risk
+            # Collapsed near-duplicates share the risk of the analyzed item
+            for duplicate in risk.get('duplicates', []):
+                risk_lookup.setdefault(duplicate, risk)
+                duplicate_of.setdefault(duplicate, risk.get('post_id'))
         
-        # Extract all timeline entries from footprints
+        def risk_score(url: Optional[str]) -> float:
+            if url in risk_lookup:
+                return risk_lookup[url].get('metrics', {}).get('overall_risk', 0.0)
+            return 0.0
+        
+        def is_flagged(url: Optional[str]) -> bool:
+            return bool(url in risk_lookup and risk_lookup[url].get('flagged'))
+        
+        # One stream per account: sorted epoch seconds, risk scores, flags, platform code, events
+        platforms: List[Platform] = []
+        streams = []
         for platform, results in footprints.items():
+            try:
+                platform_enum = Platform(platform)
+            except ValueError:
+                platform_enum = Platform.OTHER
+            if platform_enum not in platforms:
+                platforms.append(platform_enum)
+            platform_code = platforms.index(platform_enum)
+            
             for result in results:
+                timestamps: List[int] = []
+                risks: List[float] = []
+                flags: List[bool] = []
+                events: List[tuple] = []
+                
                 # Add account creation (estimated from first post)
-                if result.posts:
-                    first_post = result.posts[0]
-                    if 'timestamp' in first_post:
-                        try:
-                            ts = self._parse_timestamp(first_post['timestamp'])
-                            try:
-                                platform_enum = Platform(platform)
-                            except ValueError:
-                                platform_enum = Platform.OTHER
-                            timeline_entries.append(TimelineEntry(
-                                timestamp=ts,
-                                platform=platform_enum,
-                                type="account_created",
-                                content=f"Account created on {platform}",
-                                url=result.profile_url,
-                                risk_score=0.0
-                            ))
-                        except Exception:
-                            pass
+                if result.posts and result.posts[0].epoch is not None:
+                    timestamps.append(int(result.posts[0].epoch))
+                    risks.append(0.0)
+                    flags.append(False)
+                    events.append((platform_enum, 'account_created', f"Account created on {platform}", result.profile_url, None))
                 
                 # Add posts
                 for post in result.posts:
-                    if 'timestamp' in post:
-                        try:
-                            ts = self._parse_timestamp(post['timestamp'])
-                            content = post.get('content', post.get('title', ''))
-                            url = post.get('url', result.profile_url)
-                            
-                            # Get risk score
-                            risk_score = 0.0
-                            if url in risk_lookup:
-                                risk_score = risk_lookup[url].get('metrics', {}).get('overall_risk', 0.0)
-                            
-                            try:
-                                platform_enum = Platform(platform)
-                            except ValueError:
-                                platform_enum = Platform.OTHER
-                            timeline_entries.append(TimelineEntry(
-                                timestamp=ts,
-                                platform=platform_enum,
-                                type="post",
-                                content=content[:200],  # Truncate for display
-                                url=url,
-                                risk_score=risk_score
-                            ))
-                        except Exception:
-                            pass
+                    if post.epoch is not None:
+                        url = post.url or result.profile_url
+                        timestamps.append(int(post.epoch))
+                        risks.append(risk_score(url))
+                        flags.append(is_flagged(url))
+                        events.append((platform_enum, 'post', post.text, url, duplicate_of.get(url)))
                 
                 # Add comments
                 for comment in result.comments:
-                    if 'timestamp' in comment:
-                        try:
-                            ts = self._parse_timestamp(comment['timestamp'])
-                            content = comment.get('content', '')
-                            url = comment.get('url', result.profile_url)
-                            
-                            # Get risk score
-                            risk_score = 0.0
-                            if url in risk_lookup:
-                                risk_score = risk_lookup[url].get('metrics', {}).get('overall_risk', 0.0)
-                            
-                            try:
-                                platform_enum = Platform(platform)
-                            except ValueError:
-                                platform_enum = Platform.OTHER
-                            timeline_entries.append(TimelineEntry(
-                                timestamp=ts,
-                                platform=platform_enum,
-                                type="comment",
-                                content=content[:200],  # Truncate for display
-                                url=url,
-                                risk_score=risk_score
-                            ))
-                        except Exception:
-                            pass
-        
-        # Sort by timestamp
-        timeline_entries.sort(key=lambda x: x.timestamp)
-        
-        return timeline_entries
-    
-    def _parse_timestamp(self, timestamp: Any) -> datetime:
-        """Parse timestamp from various formats"""
-        if isinstance(timestamp, datetime):
-            return timestamp
+                    if comment.epoch is not None:
+                        url = comment.url or result.profile_url
+                        timestamps.append(int(comment.epoch))
+                        risks.append(risk_score(url))
+                        flags.append(is_flagged(url))
+                        events.append((platform_enum, 'comment', comment.content, url, duplicate_of.get(url)))
+                
+                if events:
+                    account_timestamps = np.array(timestamps, dtype=np.int64)
+                    order = np.argsort(account_timestamps, kind='stable')
+                    streams.append((
+                        account_timestamps[order],
+                        np.array(risks, dtype=float)[order],
+                        np.array(flags, dtype=bool)[order],
+                        np.full(len(order), platform_code, dtype=np.int64),
+                        [events[i] for i in order]
+                    ))
         
-        if isinstance(timestamp, str):
-            # Try ISO format
-            try:
-                return datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-            except ValueError:
-                pass
-            
-            # Try common formats
-            formats = [
-                '%Y-%m-%d %H:%M:%S',
-                '%Y-%m-%dT%H:%M:%S',
-                '%Y-%m-%d',
-                '%d/%m/%Y',
-                '%m/%d/%Y'
-            ]
-            
-            for fmt in formats:
-                try:
-                    return datetime.strptime(timestamp, fmt)
-                except ValueError:
-                    continue
-        
-        # Default to now if parsing fails
-        return datetime.now()
-
+        if not streams:
+            return Timeline(np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0, dtype=bool),
+                            np.zeros(0, dtype=np.int64), platforms, [])
+        
+        # K-way merge of the sorted streams; ties go to the earlier stream, then the earlier row
+        merged = heapq.merge(*(
+            zip(stream[0].tolist(), repeat(s), range(len(stream[0])))
+            for s, stream in enumerate(streams)
+        ))
+        offsets = np.cumsum([0] + [len(stream[0]) for stream in streams]).tolist()
+        order = np.fromiter((offsets[s] + row for _, s, row in merged), dtype=np.int64, count=offsets[-1])
+        all_events = [event for stream in streams for event in stream[4]]
+        
+        return Timeline(
+            np.concatenate([stream[0] for stream in streams])[order],
+            np.concatenate([stream[1] for stream in streams])[order],
+            np.concatenate([stream[2] for stream in streams])[order],
+            np.concatenate([stream[3] for stream in streams])[order],
+            platforms,
+            [all_events[i] for i in order.tolist()]
+        )
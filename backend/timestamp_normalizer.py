@@ -0,0 +1,128 @@
+"""
+Copyright (c) 2024 FootprintScan. All Rights Reserved.
+
+This software and associated documentation files (the "Software") are proprietary
+and confidential. Unauthorized copying, modification, distribution, or use of
+this Software, via any medium, is strictly prohibited without express written
+permission from the copyright holder.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+"""
+
+import math
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from records import AccountRecord
+
+EPOCH = 'epoch'
+ISO8601 = 'iso8601'
+
+# Tried in order when a source does not declare its format
+GUESS_FORMATS = (
+    EPOCH,
+    ISO8601,
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d',
+    '%d/%m/%Y',
+    '%m/%d/%Y'
+)
+
+_PARSE_ERRORS = (ValueError, TypeError, AttributeError, OverflowError)
+
+# Parsed timestamps outside 1970-01-01 .. 2100-01-01 UTC are treated as unparseable
+MIN_EPOCH = 0.0
+MAX_EPOCH = 4102444800.0
+
+# Epochs above these magnitudes are taken as nanoseconds, microseconds and milliseconds
+_EPOCH_SCALES = ((1e17, 1e9), (1e14, 1e6), (1e11, 1e3))
+
+
+def _utc_epoch(dt: datetime) -> float:
+    # Naive datetimes are taken as UTC
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _checked(ts: float) -> float:
+    if not math.isfinite(ts) or not MIN_EPOCH <= ts <= MAX_EPOCH:
+        raise ValueError(f"timestamp out of range: {ts}")
+    return ts
+
+
+def _parse_epoch(value: Any) -> float:
+    if isinstance(value, bool):
+        raise TypeError('not a timestamp')
+    ts = float(value)
+    if not math.isfinite(ts):
+        raise ValueError('not a timestamp')
+    for limit, scale in _EPOCH_SCALES:
+        if abs(ts) > limit:
+            return ts / scale
+    return ts
+
+
+def _parse_iso(value: str) -> float:
+    return _utc_epoch(datetime.fromisoformat(value.replace('Z', '+00:00')))
+
+
+def _strptime_parser(fmt: str) -> Callable[[str], float]:
+    return lambda value: _utc_epoch(datetime.strptime(value, fmt))
+
+
+class TimestampNormalizer:
+    """
+    Converts scraped timestamps to UTC epoch seconds, once, right after scraping.
+    
+    A scraper declares its format with the timestamp_format class attribute
+    ('epoch', 'iso8601' or a strptime format). For sources that don't, the
+    first format that parses is remembered per source and tried first next time.
+    """
+    
+    def __init__(self):
+        self._parsers: Dict[str, Callable[[Any], float]] = {EPOCH: _parse_epoch, ISO8601: _parse_iso}
+        self._guesses: Dict[str, str] = {}
+    
+    def _parser(self, timestamp_format: str) -> Callable[[Any], float]:
+        parser = self._parsers.get(timestamp_format)
+        if parser is None:
+            parser = self._parsers[timestamp_format] = _strptime_parser(timestamp_format)
+        return parser
+    
+    def parse(self, value: Any, timestamp_format: Optional[str] = None, source: str = '') -> Optional[float]:
+        """Epoch seconds for value, or None if it can't be parsed or is out of range"""
+        if value is None or value == '':
+            return None
+        if isinstance(value, datetime):
+            try:
+                return _checked(_utc_epoch(value))
+            except _PARSE_ERRORS:
+                return None
+        
+        if timestamp_format:
+            try:
+                return _checked(self._parser(timestamp_format)(value))
+            except _PARSE_ERRORS:
+                pass
+        
+        guess = self._guesses.get(source)
+        candidates = (guess,) + GUESS_FORMATS if guess else GUESS_FORMATS
+        for candidate in candidates:
+            try:
+                ts = _checked(self._parser(candidate)(value))
+            except _PARSE_ERRORS:
+                continue
+            self._guesses[source] = candidate
+            return ts
+        
+        return None
+    
+    def normalize(self, results: List[AccountRecord], timestamp_format: Optional[str] = None, source: str = ''):
+        """Set epoch on every post and comment from its scraped timestamp; unparseable ones stay None"""
+        for result in results:
+            for item in result.posts + result.comments:
+                if item.timestamp is not None:
+                    item.epoch = self.parse(item.timestamp, timestamp_format, source)
@@ -59,10 +59,12 @@ export default function Home() {
     }
   };
 
-  const exportToJSON = () => {
+  const exportToJSON = async () => {
     if (!results) return;
     
-    const dataStr = JSON.stringify(results.exportable_report, null, 2);
+    // The report is built on request rather than sent with every scan
+    const report = results.exportable_report ?? (await axios.get(`${API_BASE_URL}/export/${results.scan_id}`)).data;
+    const dataStr = JSON.stringify(report, null, 2);
     const dataBlob = new Blob([dataStr], { type: 'application/json' });
     const url = URL.createObjectURL(dataBlob);
     const link = document.createElement('a');
@@ -50,6 +50,7 @@ export interface RiskAnalysis {
   metrics: RiskMetrics;
   flagged: boolean;
   flags: string[];
+  duplicates: string[];
 }
 
 export interface TimelineEntry {
@@ -59,6 +60,37 @@ export interface TimelineEntry {
   content: string;
   url?: string;
   risk_score: number;
+  duplicate_of?: string;
+}
+
+export interface TimelinePage {
+  scan_id: string;
+  entries: TimelineEntry[];
+  total: number;
+  next_cursor?: number | null;
+}
+
+export interface TimelineHistogram {
+  scan_id: string;
+  granularity: 'day' | 'week' | 'month';
+  bucket_start: number[];
+  platform: string[];
+  count: number[];
+  mean_risk: number[];
+  max_risk: number[];
+  flagged: number[];
+}
+
+export interface ScanHistoryEntry {
+  scan_id: string;
+  scan_timestamp: string;
+  query: QueryInputs;
+  lexicon_version?: string | null;
+  summary: Record<string, any>;
+}
+
+export interface ScanHistory {
+  scans: ScanHistoryEntry[];
 }
 
 export interface ConfidenceScore {
@@ -68,13 +100,27 @@ export interface ConfidenceScore {
   factors: Record<string, number>;
 }
 
+export interface IdentityClusterMember {
+  platform: string;
+  username?: string;
+  profile_url: string;
+}
+
+export interface IdentityCluster {
+  cluster_id: number;
+  members: IdentityClusterMember[];
+  confidence: number;
+}
+
 export interface ScanResponse {
   accounts_found: number;
   footprints: Record<string, FootprintResult[]>;
   confidence_scores: ConfidenceScore[];
   risk_analysis: RiskAnalysis[];
   timeline: TimelineEntry[];
-  exportable_report: Record<string, any>;
+  identity_clusters: IdentityCluster[];
+  summary?: Record<string, any> | null;
+  exportable_report?: Record<string, any> | null;
   scan_id: string;
   scan_timestamp: string;
 }